@@ -0,0 +1,135 @@
+import argparse
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from engine import ARCHETYPES, DEFAULT_STACKING, Stacking, game_result
+from sim import greedy_policy, play_game
+
+# Adaptive deck stacking. The standard deck is equally stacked for every
+# table, but a Soloist+Sprinter table and an Atlas+Peacemaker table do not
+# find it equally hard. At game start tune_stacking() runs a short, time-boxed
+# batch of self-play games for the actual archetypes and rolls and picks the
+# stacking whose predicted win rate lands in the target band.
+#
+# Predictions come from greedy self-play, so they are a proxy: greedy rarely
+# wins with the standard deck, and people play better than it. The band is in
+# those units; what matters is that every table is tuned to the same one.
+
+# Stackings from hardest to easiest, each a measurable step easier than the
+# one before it for an average table (greedy, 800 games each).
+LADDER = [
+    Stacking(6, 10, 8),  # 0.000
+    DEFAULT_STACKING,    # 0.000
+    Stacking(4, 20, 12), # 0.001
+    Stacking(3, 20, 12), # 0.010
+    Stacking(2, 20, 12), # 0.026
+    Stacking(1, 20, 12), # 0.051
+    Stacking(2, 40, 12), # 0.064
+    Stacking(1, 20, 16), # 0.074
+    Stacking(1, 40, 12), # 0.096
+    Stacking(0, 20, 12), # 0.114
+    Stacking(1, 40, 16), # 0.130
+    Stacking(1, 40, 20), # 0.164
+    Stacking(0, 20, 16), # 0.181
+    Stacking(0, 40, 20), # 0.230
+]
+DEFAULT_BAND = (0.05, 0.12) # Target greedy win rate
+TIME_BUDGET = 0.5 # Seconds of simulation per new setup
+MIN_GAMES = 30 # Per probe, even when the budget has run out
+
+@dataclass
+class Probe:
+    stacking: Stacking
+    wins: int
+    games: int
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games
+
+@dataclass
+class Tuning:
+    stacking: Stacking
+    win_rate: float # Predicted, for the chosen stacking
+    in_band: bool
+    probes: list = field(default_factory=list) # Every Probe run, in order
+    seconds: float = 0.0
+
+# --- 1. PREDICTION ---
+
+def predict(archetypes, rolls, stacking, deadline, min_games=MIN_GAMES, first_seed=0):
+    # Greedy self-play at this table until the deadline. Every probe uses the
+    # same seeds, so two stackings are compared on the same policy dice and
+    # shuffles (common random numbers, as in sim.compare).
+    wins = games = 0
+    while games < min_games or time.perf_counter() < deadline:
+        g = play_game(greedy_policy, first_seed + games, archetypes, rolls=rolls, stacking=stacking)
+        wins += game_result(g)[1]
+        games += 1
+    return Probe(stacking, wins, games)
+
+def _distance(rate, band):
+    return max(band[0] - rate, rate - band[1], 0.0)
+
+# --- 2. SEARCH ---
+
+def search(archetypes, rolls, band=DEFAULT_BAND, budget=TIME_BUDGET):
+    # Bisection over LADDER, starting at the standard deck. Each probe gets an
+    # equal share of what is left of the budget.
+    t0 = time.perf_counter()
+    deadline = t0 + budget
+    lo, hi = 0, len(LADDER) - 1
+    i = LADDER.index(DEFAULT_STACKING)
+    probes = []
+    while lo <= hi:
+        left = max(1, math.ceil(math.log2(hi - lo + 2)))
+        now = time.perf_counter()
+        probe = predict(archetypes, rolls, LADDER[i], now + max(0.0, deadline - now) / left)
+        probes.append(probe)
+        if probe.win_rate < band[0]: lo = i + 1 # Too hard
+        elif probe.win_rate > band[1]: hi = i - 1 # Too easy
+        else: break
+        i = (lo + hi) // 2
+    best = min(probes, key=lambda p: (_distance(p.win_rate, band), -p.games))
+    return Tuning(best.stacking, best.win_rate, _distance(best.win_rate, band) == 0, probes, time.perf_counter() - t0)
+
+# --- 3. CACHE ---
+# Per (archetypes, rolls, band), process wide, so a repeated setup is free
+# for every session. Up to six seats there are millions of possible keys and
+# the server runs for days, so only the CACHE_SIZE most recently used are kept.
+
+CACHE_SIZE = 1024
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def tune_stacking(archetypes, rolls, band=DEFAULT_BAND, budget=TIME_BUDGET):
+    key = (tuple(archetypes), tuple(rolls), tuple(band))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    tuning = search(list(archetypes), list(rolls), band, budget)
+    with _cache_lock:
+        tuning = _cache.setdefault(key, tuning)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE: _cache.popitem(last=False)
+        return tuning
+
+def format_tuning(t):
+    lines = [f"Stacking: {t.stacking.hurricanes} Hurricanes in the top {t.stacking.depth}, {t.stacking.shines} Shines"
+             f" | predicted win rate {t.win_rate:.3f}{'' if t.in_band else ' (band not reachable)'} | {t.seconds:.2f}s"]
+    for p in t.probes:
+        lines.append(f"  {tuple(p.stacking)}: {p.win_rate:.3f} over {p.games} games")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick a deck stacking for a table by time-boxed self-play.")
+    parser.add_argument("archetypes", nargs="+", choices=ARCHETYPES, help="One per seat")
+    parser.add_argument("--rolls", nargs="+", type=int, required=True, help="Starting capacity per seat")
+    parser.add_argument("--band", nargs=2, type=float, default=DEFAULT_BAND)
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET, help="Seconds of simulation")
+    args = parser.parse_args()
+    if len(args.rolls) != len(args.archetypes): parser.error("--rolls needs one value per archetype")
+    print(format_tuning(tune_stacking(args.archetypes, args.rolls, args.band, args.budget)))
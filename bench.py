@@ -0,0 +1,281 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+from engine import (
+    ARCHETYPES, Player, create_deck, draw_card, calculate_vals, fork, resolve_exhaust, preview_exhaust,
+    legal_inputs, apply_input, game_result, new_table,
+)
+from sim import play_game, greedy_policy
+from views import player_card_html, rain_card_html, sparklines_html
+
+# Microbenchmarks for the game's hot paths. Stdlib only, runs offline.
+#
+#   python bench.py                 # print timings
+#   python bench.py --save          # record them as the new baseline
+#   python bench.py --check         # exit 1 if anything regressed past --threshold
+#
+# Each benchmark is `fn(number) -> seconds` so it can keep its own setup out
+# of the timed region. Every repeat is timed with the garbage collector off
+# (as timeit does) and divided by a fixed calibration loop timed just before
+# it, so a slower or busier machine shifts both and the ratio stays put. The
+# reported figure is the median ratio; the spread between repeats is the
+# noise band, and --check only flags a slowdown larger than threshold + noise.
+# Ratios still move with the Python version: re-save after upgrading.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# --- 1. FIXTURES ---
+
+TABLE = ["Atlas", "Peacemaker", "Soloist", "Sprinter", "Atlas", "Peacemaker"]
+
+def game_at_turn(turn, seed=0, players=2):
+    # A live game that has reached `turn` under the greedy policy.
+    while True:
+        g = new_table([f"Player {i + 1}" for i in range(players)], TABLE[:players], [9, 8, 9, 8, 9, 8][:players], seed=seed)
+        rng = random.Random(seed)
+        while g.turn < turn and not game_result(g)[0]:
+            apply_input(g, greedy_policy(g, legal_inputs(g), rng))
+        if not game_result(g)[0] and g.phase == "Strategy": return g
+        seed += 1
+
+def with_long_log(g, lines):
+    g = fork(g)
+    filler = g.log or ["Turn 1 | Player 1 (Atlas) SELF-CARES. Capacity 9 -> 12."]
+    while len(g.log) < lines: g.log.extend(filler)
+    del g.log[lines:]
+    return g
+
+def player_pairs():
+    pairs = []
+    for a1 in ARCHETYPES:
+        for a2 in ARCHETYPES:
+            for cap in (12, 7, 3):
+                p = Player("A", a1, capacity=cap); p.update_status()
+                q = Player("B", a2, capacity=15 - cap); q.update_status()
+                pairs.append((p, q))
+    return pairs
+
+# --- 2. BENCHMARKS ---
+
+def timed(fn, number):
+    t0 = time.perf_counter()
+    for _ in range(number): fn()
+    return time.perf_counter() - t0
+
+def _calibration_work():
+    # Plain interpreter work (loops, dict and list operations) that the
+    # engine's code never changes.
+    counts = {}
+    for i in range(300): counts[i % 17] = counts.get(i % 17, 0) + i
+    return sorted(counts.values())
+
+def calibrate(number=200):
+    return timed(_calibration_work, number) / number
+
+def bench_create_deck(number):
+    rng = random.Random(1)
+    return timed(lambda: create_deck(rng), number)
+
+def bench_draw_full_deck(number):
+    # Draw every card of a fresh deck, the way a long game does.
+    template = create_deck(random.Random(1))
+    decks = [list(template) for _ in range(number)]
+    stats = {"Drizzle": 0, "Downpour": 0, "Hurricane": 0, "Shine": 0}
+    t0 = time.perf_counter()
+    for deck in decks:
+        for _ in range(len(template)): draw_card(deck, stats)
+    return time.perf_counter() - t0
+
+def bench_draw_refill(number):
+    # Late game: the deck is empty so every draw rebuilds it.
+    rng = random.Random(1)
+    stats = {"Drizzle": 0, "Downpour": 0, "Hurricane": 0, "Shine": 0}
+    return timed(lambda: draw_card([], stats, rng), number)
+
+def bench_calculate_vals(number):
+    pairs = player_pairs()
+    def run():
+        for p, q in pairs: calculate_vals(p, q)
+    return timed(run, number)
+
+def checkpoint_bench(g):
+    # save_checkpoint followed by restore_checkpoint.
+    def bench(number):
+        return timed(lambda: fork(fork(g)), number)
+    return bench
+
+def bench_checkpoint_sessions(number):
+    # One undo snapshot for each of 200 concurrent sessions.
+    games = [game_at_turn(2 + i % 5, seed=i) for i in range(200)]
+    def run():
+        for g in games: fork(g)
+    return timed(run, number)
+
+def exhaust_bench(g):
+    def bench(number):
+        states = [fork(g) for _ in range(number)]
+        t0 = time.perf_counter()
+        for h in states: resolve_exhaust(h)
+        return time.perf_counter() - t0
+    return bench
+
+def bench_exhaust_preview(number):
+    g = game_at_turn(4)
+    return timed(lambda: preview_exhaust(g), number)
+
+def bench_render_p(number):
+    g = game_at_turn(4)
+    def run():
+        for seat, p in enumerate(g.players):
+            player_card_html(p, True)
+            sparklines_html(g, seat)
+            if p.active_card: rain_card_html(p.active_card)
+    return timed(run, number)
+
+def play_game_bench(players):
+    def bench(number):
+        seeds = iter(range(10**9))
+        return timed(lambda: play_game(greedy_policy, next(seeds), players=players), number)
+    return bench
+
+def per_seat(bench, players):
+    # Time per seat, so table sizes compare directly: flat means linear scaling.
+    def scaled(number):
+        return bench(number) / players
+    return scaled
+
+def per_seat_turn(players):
+    # Greedy self-play time per seat per turn. Bigger tables end sooner, so
+    # whole-game time would hide how each turn scales.
+    def bench(number):
+        seat_turns = 0
+        t0 = time.perf_counter()
+        for seed in range(number):
+            seat_turns += play_game(greedy_policy, seed, players=players).turn * players
+        return (time.perf_counter() - t0) / seat_turns * number # the runner divides by `number`
+    return bench
+
+def benchmarks():
+    mid = game_at_turn(4)
+    late = game_at_turn(8)
+    long_log = with_long_log(mid, 5000)
+    six = game_at_turn(4, players=6)
+    # name -> (fn, calls per repeat)
+    return {
+        "create_deck": (bench_create_deck, 200),
+        "draw_card/full_deck": (bench_draw_full_deck, 200),
+        "draw_card/refill": (bench_draw_refill, 200),
+        "calculate_vals/48_pairs": (bench_calculate_vals, 500),
+        "checkpoint/turn_4": (checkpoint_bench(mid), 200),
+        "checkpoint/turn_8": (checkpoint_bench(late), 200),
+        "checkpoint/log_5000": (checkpoint_bench(long_log), 200),
+        "checkpoint/200_sessions": (bench_checkpoint_sessions, 5),
+        "exhaust/resolve_turn_4": (exhaust_bench(mid), 500),
+        "exhaust/resolve_log_5000": (exhaust_bench(long_log), 500),
+        "exhaust/preview": (bench_exhaust_preview, 200),
+        "exhaust/resolve_turn_4_per_seat_2p": (per_seat(exhaust_bench(mid), 2), 500),
+        "exhaust/resolve_turn_4_per_seat_6p": (per_seat(exhaust_bench(six), 6), 500),
+        "render_p/html": (bench_render_p, 2000),
+        "sim/play_game_greedy": (play_game_bench(2), 50),
+        "sim/turn_per_seat_2p": (per_seat_turn(2), 50),
+        "sim/turn_per_seat_6p": (per_seat_turn(6), 20),
+    }
+
+# --- 3. RUNNER ---
+
+def _quantile(xs, q):
+    xs = sorted(xs)
+    i = (len(xs) - 1) * q
+    lo = int(i)
+    return xs[lo] + (xs[min(lo + 1, len(xs) - 1)] - xs[lo]) * (i - lo)
+
+def measure(fn, number, repeat):
+    # (median seconds per call, median calibration units per call, noise),
+    # noise being the interquartile range of the units relative to their median.
+    fn(max(1, number // 5)) # warm-up
+    secs, units = [], []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            unit = calibrate()
+            sec = fn(number) / number
+            secs.append(sec); units.append(sec / unit)
+    finally:
+        if enabled: gc.enable()
+    mid = _quantile(units, 0.5)
+    return _quantile(secs, 0.5), mid, (_quantile(units, 0.75) - _quantile(units, 0.25)) / mid
+
+def run(names=None, repeat=9, scale=1.0):
+    # name -> (seconds, units, noise)
+    results = {}
+    for name, (fn, number) in benchmarks().items():
+        if names and not any(n in name for n in names): continue
+        results[name] = measure(fn, max(1, int(number * scale)), repeat)
+    return results
+
+def fmt_time(sec):
+    if sec >= 1e-3: return f"{sec * 1e3:9.3f} ms"
+    return f"{sec * 1e6:9.2f} us"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rain or Shine hot-path benchmarks.")
+    parser.add_argument("filter", nargs="*", help="Only run benchmarks whose name contains one of these")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Fail if any benchmark regressed past --threshold")
+    parser.add_argument("--threshold", type=float, default=0.30, help="Allowed slowdown beyond the noise band, e.g. 0.30 = 30%%")
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--quick", action="store_true", help="Fewer calls per repeat (noisier)")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.repeat, 0.2 if args.quick else 1.0)
+
+    base = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fp: saved = json.load(fp)
+        # Baselines from before calibration hold raw seconds and cannot be compared.
+        if saved.get("units") == "calibration": base = saved["results"]
+        else: print(f"{args.baseline} predates calibrated timings; re-save it with --save.")
+    elif args.check:
+        print(f"No baseline at {args.baseline}; create one with --save.")
+
+    regressions, missing = [], []
+    for name, (sec, units, noise) in results.items():
+        line = f"{name:36s} {fmt_time(sec)} {units:10.3f} cal  +-{noise:4.0%}"
+        if name in base:
+            ratio = units / base[name]["units"]
+            band = args.threshold + noise + base[name]["noise"]
+            line += f"   {ratio:5.2f}x baseline"
+            if ratio > 1 + band:
+                line += "  << REGRESSION"
+                regressions.append(name)
+        else:
+            missing.append(name)
+        print(line)
+
+    if args.save:
+        fresh = {name: {"units": units, "noise": noise} for name, (_, units, noise) in results.items()}
+        if args.filter: base.update(fresh)
+        else: base = fresh
+        with open(args.baseline, "w") as fp:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "units": "calibration",
+                       "calibration_seconds": calibrate(), "results": base}, fp, indent=2, sort_keys=True)
+            fp.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        missing = []
+
+    if args.check and regressions:
+        print(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%} beyond the noise band: {', '.join(regressions)}")
+    # A gate with nothing to compare against must not pass.
+    if args.check and missing:
+        print(f"{len(missing)} benchmark(s) have no baseline to check against: {', '.join(missing)}")
+    return 1 if args.check and (regressions or missing) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
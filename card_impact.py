@@ -0,0 +1,144 @@
+import argparse
+import math
+from engine import CATALOG, outcome_code
+from records import read_archive, replay
+from sim import POLICIES, play_game
+
+# Streaming per-card impact attribution.
+#
+# CardImpact consumes finished games one at a time and keeps, per card and per
+# draw position, only running counts and sums. Its memory is a fixed set of
+# len(CATALOG) x POSITIONS counters no matter how many games pass through.
+#
+# "Damage" is the Exhaust a card put on the table while it was active (its
+# exhaust value each end of turn, plus 1 joint stress per neighbour), before
+# absorbs and Pain Tolerance; see engine.resolve_exhaust. Per draw position
+# it is credited to the position the card was first drawn at in that game.
+
+POSITIONS = 33 # Draw positions 0..31 tracked exactly, 32+ pooled in the last slot
+EARLY = 10 # Draws before this position count as "early"
+# Sort keys, and whether larger is more harmful (the report lists that end first).
+SORT_KEYS = {"resolved_delta": False, "win_delta": False, "damage_per_game": True}
+
+class CardImpact:
+    def __init__(self):
+        n = len(CATALOG)
+        self.games = 0
+        self.wins = 0
+        self.resolved = 0
+        self.skipped = 0 # Records that cannot be replayed (no seed or deck, e.g. parsed from a text log)
+        self.games_drawn = [0] * n # Games in which the card was drawn at least once
+        self.wins_drawn = [0] * n
+        self.resolved_drawn = [0] * n
+        self.damage = [0] * n
+        self.damage_sq = [0] * n # Per game, for the spread of the damage figure
+        self.pos_games = [[0] * POSITIONS for _ in range(n)]
+        self.pos_wins = [[0] * POSITIONS for _ in range(n)]
+        self.pos_damage = [[0] * POSITIONS for _ in range(n)]
+
+    def add(self, g):
+        win = 1 if outcome_code(g) == 1 else 0
+        self.games += 1
+        self.wins += win
+        self.resolved += g.resolved
+
+        first_pos = {}
+        for pos, cid in enumerate(g.draws):
+            if cid not in first_pos: first_pos[cid] = pos
+        for cid, pos in first_pos.items():
+            slot = min(pos, POSITIONS - 1)
+            self.games_drawn[cid] += 1
+            self.wins_drawn[cid] += win
+            self.resolved_drawn[cid] += g.resolved
+            self.pos_games[cid][slot] += 1
+            self.pos_wins[cid][slot] += win
+        for cid, dmg in g.card_damage.items():
+            self.damage[cid] += dmg
+            self.damage_sq[cid] += dmg * dmg
+            if cid in first_pos: self.pos_damage[cid][min(first_pos[cid], POSITIONS - 1)] += dmg
+
+    def add_record(self, rec):
+        # Per-card figures need the draws, so a record that cannot be replayed
+        # is counted as skipped rather than mixed into the game-level totals.
+        try:
+            g = replay(rec)
+        except ValueError:
+            self.skipped += 1
+            return
+        self.add(g)
+
+    def merge(self, other):
+        # Combine partial results, e.g. from parallel workers.
+        self.games += other.games; self.wins += other.wins; self.resolved += other.resolved; self.skipped += other.skipped
+        for cid in range(len(CATALOG)):
+            self.games_drawn[cid] += other.games_drawn[cid]
+            self.wins_drawn[cid] += other.wins_drawn[cid]
+            self.resolved_drawn[cid] += other.resolved_drawn[cid]
+            self.damage[cid] += other.damage[cid]
+            self.damage_sq[cid] += other.damage_sq[cid]
+            for slot in range(POSITIONS):
+                self.pos_games[cid][slot] += other.pos_games[cid][slot]
+                self.pos_wins[cid][slot] += other.pos_wins[cid][slot]
+                self.pos_damage[cid][slot] += other.pos_damage[cid][slot]
+
+    def rows(self):
+        # One summary dict per card that was drawn at least once.
+        out = []
+        for cid, card in enumerate(CATALOG):
+            n = self.games_drawn[cid]
+            if not n: continue
+            n_not = self.games - n
+            win_rate = self.wins_drawn[cid] / n
+            win_rate_not = (self.wins - self.wins_drawn[cid]) / n_not if n_not else 0.0
+            resolved = self.resolved_drawn[cid] / n
+            resolved_not = (self.resolved - self.resolved_drawn[cid]) / n_not if n_not else 0.0
+            dmg = self.damage[cid] / n
+            dmg_sd = math.sqrt(max(0.0, self.damage_sq[cid] / n - dmg * dmg) * n / (n - 1)) if n > 1 else 0.0
+            early_n = sum(self.pos_games[cid][:EARLY])
+            late_n = n - early_n
+            out.append({
+                "id": cid, "title": card.title, "type": card.type, "weight": card.weight,
+                "games": n, "win_rate": win_rate, "win_delta": win_rate - win_rate_not,
+                "resolved_delta": resolved - resolved_not, "damage_per_game": dmg,
+                "damage_sd": dmg_sd, # Spread of the card's damage across the games it was drawn in
+                "early_win_rate": sum(self.pos_wins[cid][:EARLY]) / early_n if early_n else None,
+                "late_win_rate": sum(self.pos_wins[cid][EARLY:]) / late_n if late_n else None,
+                "early_damage": sum(self.pos_damage[cid][:EARLY]) / early_n if early_n else None,
+                "late_damage": sum(self.pos_damage[cid][EARLY:]) / late_n if late_n else None,
+            })
+        return out
+
+    def report(self, key="resolved_delta", top=None):
+        rows = sorted(self.rows(), key=lambda r: r[key], reverse=SORT_KEYS[key])
+        if top: rows = rows[:top]
+        lines = [
+            f"{self.games} games | win rate {self.wins / max(1, self.games):.3f} | cards resolved {self.resolved / max(1, self.games):.2f}"
+            + (f" | {self.skipped} records skipped (cannot be replayed)" if self.skipped else ""),
+            f"Ranked by {key} (most harmful first). Deltas compare games where the card was drawn against games where it was not.",
+            f"{'Card':28s} {'Type':9s} {'W':>3s} {'Games':>7s} {'Win%':>6s} {'dWin':>7s} {'dRes':>6s} {'Dmg/g':>6s} {'SD':>5s} {'Early%':>7s} {'Late%':>6s} {'EDmg':>6s} {'LDmg':>6s}",
+        ]
+        for r in rows:
+            early = f"{r['early_win_rate'] * 100:6.1f}" if r["early_win_rate"] is not None else "     -"
+            late = f"{r['late_win_rate'] * 100:6.1f}" if r["late_win_rate"] is not None else "     -"
+            early_dmg = f"{r['early_damage']:6.2f}" if r["early_damage"] is not None else "     -"
+            late_dmg = f"{r['late_damage']:6.2f}" if r["late_damage"] is not None else "     -"
+            lines.append(f"{r['title'][:28]:28s} {r['type']:9s} {r['weight']:3d} {r['games']:7d} {r['win_rate'] * 100:6.1f} "
+                         f"{r['win_delta'] * 100:+7.2f} {r['resolved_delta']:+6.2f} {r['damage_per_game']:6.2f} {r['damage_sd']:5.2f} {early} {late} {early_dmg} {late_dmg}")
+        return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank cards by how much they decide games.")
+    parser.add_argument("--archive", help="Game record archive (.jsonl / packed, optionally .gz) instead of fresh self-play")
+    parser.add_argument("--games", type=int, default=10000, help="Self-play games to run when no archive is given")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--sort", choices=list(SORT_KEYS), default="resolved_delta")
+    parser.add_argument("--top", type=int)
+    args = parser.parse_args()
+
+    impact = CardImpact()
+    if args.archive:
+        for rec in read_archive(args.archive): impact.add_record(rec)
+    else:
+        policy = POLICIES[args.policy]
+        for seed in range(args.games): impact.add(play_game(policy, seed))
+    print(impact.report(args.sort, args.top))
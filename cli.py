@@ -0,0 +1,187 @@
+import argparse
+import random
+import sys
+from engine import (
+    ARCHETYPES, ACTION_CODES, INPUT_CODES, INPUT_NAMES, FIRST_CODES, MIN_PLAYERS, MAX_PLAYERS, SEED_LIMIT,
+    new_table, game_result, legal_inputs, apply_input, action_options, must_rest, atlas_opportunity,
+    preview_exhaust,
+)
+
+# Terminal front end: play a game, run self-play or replay recorded games
+# without Streamlit.
+#
+#   python cli.py play --players 3 --seed 7 --adaptive
+#   python cli.py sim --games 1000 --policy greedy -o games.jsonl.gz
+#   python cli.py replay games.jsonl.gz --game 12 --upto 40
+#
+# Only the engine is imported up front; sim, records and views are imported
+# by the commands that use them so the CLI starts as fast as the engine does.
+
+# --- 1. PLAY ---
+
+def roll():
+    return max(1, random.randint(1,6) + random.randint(1,6))
+
+def table_text(g):
+    lines = [f"--- Turn {g.turn} | {g.phase} | Resolved {g.resolved}/10 | Deck {len(g.deck)} ---"]
+    acting = g.actor_queue[0] if g.phase == "Action" and g.actor_queue else None
+    for i, p in enumerate(g.players):
+        card = p.active_card
+        held = f"{card.title} ({card.type}, weight {card.weight}, exhaust {card.exhaust_value()}{', joint' if card.is_joint else ''})" if card else "no card"
+        marker = ">" if i == acting else " "
+        lines.append(f"{marker} {p.name} ({p.archetype}): capacity {p.capacity} [{p.status}], "
+                     f"burnout {p.burnout_tokens}, assists {8 - p.assists_used}/8 | {held}")
+    return "\n".join(lines)
+
+def input_choices(g):
+    # (label, input code) for every legal input of the current position.
+    inputs = legal_inputs(g)
+    if g.phase == "Shine":
+        shine = g.pending_shine
+        return [(f"{g.player(g.shine_actor).name} claims {shine.title} (+{shine.weight} Capacity)", inputs[0])]
+    if g.phase == "Strategy":
+        return [(f"{g.players[FIRST_CODES.index(ch)].name} goes first", ch) for ch in inputs]
+    if g.phase == "Action":
+        if must_rest(g): return [("Active Recovery (+1 Capacity)", inputs[0])]
+        return [(label, ACTION_CODES[code]) for label, code in action_options(g) if code]
+    if g.phase == "Atlas_Intervention":
+        atlas_player, partner_player, _ = atlas_opportunity(g)
+        return [(f"{atlas_player.name} absorbs {INPUT_NAMES[ch][-1]} for {partner_player.name}", ch) for ch in inputs]
+    if g.phase == "Exhaust":
+        dmg = preview_exhaust(g)["damage"]
+        hits = ", ".join(f"{p.name} -{d}" for p, d in zip(g.players, dmg))
+        return [(f"End turn ({hits})", INPUT_CODES["end_turn"])]
+    return []
+
+def ask(choices):
+    for i, (label, _) in enumerate(choices, 1): print(f"  {i}. {label}")
+    if len(choices) == 1:
+        input("  [enter] ")
+        return choices[0][1]
+    while True:
+        raw = input(f"  Choose 1-{len(choices)}: ").strip()
+        if raw.isdigit() and 1 <= int(raw) <= len(choices): return choices[int(raw) - 1][1]
+
+def cmd_play(args):
+    n = len(args.archetypes) if args.archetypes else args.players
+    names = args.names or [f"Player {i + 1}" for i in range(n)]
+    archetypes = args.archetypes or [random.choice(ARCHETYPES) for _ in range(n)]
+    rolls = args.rolls or [roll() for _ in range(n)]
+    if not len(names) == len(archetypes) == len(rolls):
+        sys.exit("--names, --archetypes and --rolls need one entry per seat.")
+    stacking = None
+    if args.adaptive:
+        from adaptive import tune_stacking, format_tuning
+        tuning = tune_stacking(archetypes, rolls)
+        print(format_tuning(tuning).splitlines()[0])
+        stacking = tuning.stacking
+    g = new_table(names, archetypes, rolls, seed=args.seed, stacking=stacking)
+    shown = 0
+    try:
+        while not game_result(g)[0]:
+            for line in g.log[shown:]: print(line)
+            shown = len(g.log)
+            print(table_text(g))
+            apply_input(g, ask(input_choices(g)))
+    except (EOFError, KeyboardInterrupt):
+        print()
+    from views import game_report
+    print(game_report(g))
+    if args.record: _append_records(args.record, [g], args.packed)
+
+# --- 2. SELF-PLAY ---
+
+def cmd_sim(args):
+    from sim import POLICIES, play_game
+    policy = POLICIES[args.policy]
+    games = (play_game(policy, seed, args.archetypes, players=args.players) for seed in range(args.seed, args.seed + args.games))
+    wins = turns = resolved = count = 0
+    writer = None
+    if args.out: writer, fp = _open_writer(args.out, args.packed)
+    from records import game_record
+    try:
+        for g in games:
+            victory = game_result(g)[1]
+            wins += victory; turns += g.turn; resolved += g.resolved; count += 1
+            if writer: writer.write(game_record(g))
+    finally:
+        if writer: fp.close()
+    if count:
+        print(f"{count} games ({args.policy}): win rate {wins / count:.3f}, mean turns {turns / count:.2f}, "
+              f"mean resolved {resolved / count:.2f}")
+
+# --- 3. REPLAY ---
+
+def cmd_replay(args):
+    from records import read_archive, replay
+    from views import game_report
+    count = 0
+    try:
+        for rec in read_archive(args.archive):
+            if count == args.game:
+                g = replay(rec, args.upto)
+                print(game_report(g) if game_result(g)[0] else "\n".join(g.log + [table_text(g)]))
+                return
+            count += 1
+    except ValueError as e:
+        sys.exit(f"{args.archive}: {e}")
+    sys.exit(f"{args.archive} has only {count} games.")
+
+# --- 4. ARCHIVES ---
+
+def _open_writer(path, packed):
+    from records import open_archive, JsonlWriter, PackedWriter
+    fp = open_archive(path, "ab")
+    return (PackedWriter(fp) if packed else JsonlWriter(fp)), fp
+
+def _append_records(path, games, packed):
+    from records import game_record
+    writer, fp = _open_writer(path, packed)
+    with fp:
+        for g in games: writer.write(game_record(g))
+
+def seed_arg(text):
+    # Seeds are stored as u64 in game links and packed records.
+    seed = int(text) if text.isascii() and text.isdigit() else -1
+    if not 0 <= seed < SEED_LIMIT: raise argparse.ArgumentTypeError(f"must be a whole number from 0 to {SEED_LIMIT - 1}")
+    return seed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play, simulate and replay games in the terminal.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seats = dict(type=int, default=2, choices=range(MIN_PLAYERS, MAX_PLAYERS + 1))
+
+    p = sub.add_parser("play", help="Play a game at the terminal, one seat after another")
+    p.add_argument("--players", **seats)
+    p.add_argument("--names", nargs="+")
+    p.add_argument("--archetypes", nargs="+", choices=ARCHETYPES, help="One per seat; random when omitted")
+    p.add_argument("--rolls", nargs="+", type=int, help="Starting capacity per seat; 2d6 when omitted")
+    p.add_argument("--seed", type=seed_arg, help="Deck seed, for a repeatable deal")
+    p.add_argument("--adaptive", action="store_true", help="Stack the deck for this table by a short batch of simulated games")
+    p.add_argument("--record", help="Append the finished game to this archive")
+    p.add_argument("--packed", action="store_true", help="Write the packed binary format instead of JSONL")
+    p.set_defaults(func=cmd_play)
+
+    p = sub.add_parser("sim", help="Self-play games and summarise them")
+    p.add_argument("--games", type=int, default=1000)
+    p.add_argument("--policy", choices=["greedy", "random"], default="greedy")
+    p.add_argument("--players", **seats)
+    p.add_argument("--archetypes", nargs="+", choices=ARCHETYPES, help="One per seat; overrides --players")
+    p.add_argument("--seed", type=seed_arg, default=0, help="First game seed")
+    p.add_argument("-o", "--out", help="Append the game records to this archive (.gz for compression)")
+    p.add_argument("--packed", action="store_true", help="Write the packed binary format instead of JSONL")
+    p.set_defaults(func=cmd_sim)
+
+    p = sub.add_parser("replay", help="Rebuild a recorded game and print its report")
+    p.add_argument("archive")
+    p.add_argument("--game", type=int, default=0, help="Index of the record in the archive")
+    p.add_argument("--upto", type=int, help="Stop after this many inputs and show the position")
+    p.set_defaults(func=cmd_replay)
+
+    args = parser.parse_args(argv)
+    if args.command == "sim" and args.seed + args.games > SEED_LIMIT:
+        parser.error(f"seeds run past {SEED_LIMIT - 1}; lower --seed or --games")
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,887 @@
+import random
+import copy
+from array import array
+from collections import namedtuple
+
+# Headless game core: everything here runs without Streamlit so it can be
+# shared by the UI script, background workers and batch jobs.
+
+ARCHETYPES = ["Soloist", "Sprinter", "Atlas", "Peacemaker"]
+MIN_PLAYERS = 2
+MAX_PLAYERS = 6
+SEED_LIMIT = 2 ** 64 # Seeds are stored as u64 in game links and packed records
+# Table size -> per seat, the seats either side (left first); at a two-player
+# table both sides are the same seat, listed once.
+NEIGHBOURS = {n: [tuple(dict.fromkeys(((i + 1) % n, (i - 1) % n))) for i in range(n)] for n in range(MIN_PLAYERS, MAX_PLAYERS + 1)}
+
+# --- 1. DATA STRUCTURES ---
+
+# Plain classes rather than dataclasses: every tool, worker and the CLI
+# imports this module, and importing and running dataclasses was most of its
+# cold-start time.
+
+class RainCard:
+    def __init__(self, title, weight, exhaust, is_joint=False, flavor_text="", scenario="", age=0,
+                 accumulated_tokens=0, type="Rain", discussed=False):
+        self.title = title
+        self.weight = weight
+        self.exhaust = exhaust
+        self.is_joint = is_joint
+        self.flavor_text = flavor_text
+        self.scenario = scenario # Holds the open-ended connection question
+        self.age = age
+        self.accumulated_tokens = accumulated_tokens
+        self.type = type
+        self.discussed = discussed
+
+    def __repr__(self):
+        return f"RainCard({self.title!r}, {self.type}, weight={self.weight}, exhaust={self.exhaust_value()})"
+
+    def exhaust_value(self):
+        return self.exhaust + self.accumulated_tokens
+
+class Player:
+    def __init__(self, name, archetype, capacity=0):
+        self.name = name
+        self.archetype = archetype
+        self.capacity = capacity
+        self.burnout_tokens = 0
+        self.status = "Flow"
+        self.active_card = None # RainCard being resolved this turn
+        self.sprinter_resting = False
+        self.pacing_buff = False
+        self.atlas_cooldown = False
+        self.pending_absorb = 0
+        self.assist_buff = None
+        self.peacemaker_bonus_next = False
+
+        # STATS & LIMITS
+        self.min_cap = 0
+        self.max_cap = 0
+        self.total_burnout_gained = 0
+        self.assists_used = 0 # LIMIT: Max 8 per game
+
+    def __repr__(self):
+        return f"Player({self.name!r}, {self.archetype}, capacity={self.capacity})"
+
+    def init_stats(self):
+        self.min_cap = self.capacity
+        self.max_cap = self.capacity
+
+    def mod_capacity(self, amount):
+        self.capacity += amount
+        if self.capacity < self.min_cap: self.min_cap = self.capacity
+        if self.capacity > self.max_cap: self.max_cap = self.capacity
+
+    def update_status(self):
+        if self.capacity >= 10: self.status = "Flow"
+        elif 5 <= self.capacity <= 9: self.status = "Strained"
+        else: self.status = "Burnout"
+
+class TurnSeries:
+    # Per-turn history for charts: one sample at the deal (turn 0) and one
+    # after every Exhaust, appended to flat typed arrays so an update is O(1)
+    # and charts never reparse the log. Per-seat series hold one value per
+    # seat per sample; player(name, seat) slices a seat's values out.
+    PLAYER_SERIES = ("capacity", "damage", "absorb", "weight", "stress")
+
+    def __init__(self, n):
+        self.n = n
+        self.turn = array("H")
+        self.resolved = array("H")
+        self.capacity = array("h")
+        self.damage = array("h") # Exhaust damage taken
+        self.absorb = array("h") # Damage this seat's Atlas absorbed for their partner
+        self.weight = array("h") # Weight left on the seat's Rain card, 0 without one
+        self.stress = array("h") # Stress tokens on the seat's Rain card
+
+    def __len__(self):
+        return len(self.turn)
+
+    def sample(self, g, turn, damage=None, absorb=None):
+        self.turn.append(turn)
+        self.resolved.append(g.resolved)
+        for i, p in enumerate(g.players):
+            c = p.active_card
+            self.capacity.append(p.capacity)
+            self.damage.append(damage[i] if damage else 0)
+            self.absorb.append(absorb[i] if absorb else 0)
+            self.weight.append(max(c.weight, 0) if c else 0)
+            self.stress.append(c.accumulated_tokens if c else 0)
+
+    def player(self, name, seat):
+        return getattr(self, name)[seat::self.n]
+
+class GameState:
+    # Players sit around the table in seat order; a seat index is the player
+    # id everywhere (actor_queue, shine_actor, choose_order). Each player's
+    # partner is their left neighbour, the next seat round the table, so at a
+    # two-player table the partner is simply the other player.
+    def __init__(self, players, deck, rng=None, seed=None, rolls=(), start_deck=None, stacking=None):
+        self.players = players
+        self.deck = deck
+        self.stacking = stacking or DEFAULT_STACKING # Used again when the deck runs out
+        self.turn = 1
+        self.phase = "Strategy"
+        self.resolved = 0
+        self.log = []
+        self.actor_queue = [] # Seat indices still to act this turn
+        self.sprint_actions = 0
+        self.sprinter_did_assist = False
+        self.pending_shine = None
+        self.shine_actor = None
+        self.return_to_setup = False
+        self.card_stats = {"Drizzle": 0, "Downpour": 0, "Hurricane": 0, "Shine": 0}
+        self.rng = rng if rng is not None else random.Random()
+
+        # RECORDING (see records.py)
+        self.seed = seed
+        self.rolls = rolls
+        self.start_deck = start_deck if start_deck is not None else [] # Card IDs as dealt by create_deck
+        self.actions = [] # One INPUT_CODES char per committed input
+
+        # CARD TRACKING (see card_impact.py)
+        self.draws = [] # Card IDs in the order they reached a player
+        self.card_damage = {} # Card ID -> Exhaust it put on the table
+
+        # CHARTS (see views.py)
+        self.series = TurnSeries(len(players))
+
+    # Seats 1 and 2, kept for two-player callers.
+    @property
+    def p1(self):
+        return self.players[0]
+
+    @property
+    def p2(self):
+        return self.players[1]
+
+    def player(self, pid):
+        return self.players[pid]
+
+    def partner_of(self, pid):
+        return self.players[(pid + 1) % len(self.players)]
+
+    def neighbours(self, pid):
+        return NEIGHBOURS[len(self.players)][pid]
+
+# --- 2. CARD MANIFEST ---
+
+# --- SHINE (Pool of 20, Game uses 12) ---
+SHINES = [
+    ("Retail Therapy", 3, "You bought the thing. You didn't *need* it, but seeing it in your space makes the hard week feel worth it.", "When you treat yourself, do you usually seek comfort, status, or distraction?"),
+    ("The Reunion", 4, "You see an old friend. Within five minutes, you realize you haven't laughed that hard in years.", "Who is a person from your past that you hope thinks well of you, even if you never speak again?"),
+    ("The Cleared Air", 5, "A lingering misunderstanding is finally resolved. It wasn't malice; it was just a mistake.", "What is a conversation you have been dreading that would likely bring you relief if you just had it?"),
+    ("The Cathartic Cry", 4, "You finally let it out. The ugly, sobbing kind. Afterwards, your chest feels lighter.", "When you are truly overwhelmed, do you tend to isolate yourself or seek out company?"),
+    ("A New Passion", 5, "You started a hobby just for you. No productivity, no hustle. Just the pure joy of creating.", "If you had zero need for money or approval, how would you spend your days?"),
+    ("The Pep Talk", 3, "You were spiraling, but they looked you in the eye and reminded you exactly how tough you are.", "Who is the one person in your life whose voice can actually cut through your internal panic?"),
+    ("Forgiveness", 6, "You decided to let go of the grudge. The energy you spent hating them is finally yours to keep.", "Is there an apology you are waiting for that you know you will never receive? How do you make peace with that?"),
+    ("The 'Big' News", 6, "A pregnancy, a promotion, a cure. Something monumental went right.", "When you get good news, do you share it immediately, or do you keep it close to protect it for a while?"),
+    ("Nature's Reset", 2, "The ocean, a mountain, or just a really nice tree. You realize how small your problems are.", "What is a specific physical place you go to in your mind when you need to feel calm?"),
+    ("The Unexpected Gift", 3, "It wasn't your birthday. They just saw it and thought of you. You feel known.", "What is the best gift you have ever received that wasn't expensive, but proved someone truly knew you?"),
+    ("Digital Detox", 3, "You turned the phone off for 24 hours. The noise stopped. Your brain is quiet.", "If you were forced to be alone with your thoughts for 24 hours with no distractions, what would you be afraid of thinking about?"),
+    ("The Inside Joke", 2, "A shared look across the room. You don't even have to say a word to know you're on the same team.", "What is a trait in a partner or friend that instantly makes you feel safe?"),
+    ("Feeling 'Hot'", 2, "A good hair day, a new outfit. You catch your reflection and think, 'Damn, I've still got it.'", "When do you feel most confident: when you look good, when you achieve something, or when you help someone?"),
+    ("The Volunteer", 4, "You helped someone else. Getting out of your own head healed something in you.", "What is a cause or issue that makes you feel a deep sense of responsibility?"),
+    ("A Home Cooked Meal", 3, "Not takeout. Someone spent hours making this for you. It tastes like love.", "What specific meal reminds you of a time when you felt taken care of?"),
+    ("Nostalgia Trip", 2, "A song or a photo album takes you back to a time when you felt safe.", "If you could revisit one specific year of your life for a day, which year would it be and why?"),
+    ("The Breakthrough", 5, "That issue you've been talking about in therapy for years? It finally clicked.", "What is a hard truth about yourself that you have recently started to accept?"),
+    ("Genuine Rest", 4, "Not just sleep, but rest. No alarms, no to-do lists. Your nervous system switches off.", "What does 'rest' look like to you? Is it doing nothing, or doing something you love?"),
+    ("Validation", 4, "I'm proud of you. Hearing those words from the right person changes everything.", "Whose approval do you still find yourself seeking, even as an adult?"),
+    ("Safe Space", 3, "A room, a person, or a moment where you don't have to perform. You can just exist.", "What version of yourself do you show the world, and how is it different from who you are when you are alone?")
+]
+
+# --- DRIZZLE (24 Unique) ---
+DRIZZLES = [
+    ("The Doomscroll", 3, "You sat down for five minutes. An hour passed. You feel hollow and behind schedule.", "When you check out mentally, what specific emotion or thought are you usually trying to numb?"),
+    ("Password Purgatory", 3, "Incorrect password. Reset link sent. 'New password cannot be old password.' Pure rage.", "What is a small, trivial inconvenience that consistently triggers a disproportionate amount of anger in you?"),
+    ("Running Late", 2, "You left five minutes late, and now every red light feels like a personal attack.", "When you are late, do you tend to blame external factors or internalize it as a personal failure?"),
+    ("The 'Tax'", 2, "A parking ticket. A forgotten subscription. It’s not the money; it’s the feeling of failing adulthood.", "What area of 'adulting' do you feel you are currently failing at the most?"),
+    ("Notification Overload", 2, "47 unread emails. 12 Slacks. The red dots are winning.", "Does a piled-up inbox make you feel important and needed, or anxious and overwhelmed?"),
+    ("Tech Glitch", 3, "The Wi-Fi drops right before the call. The printer jams. Inanimate objects are fighting you.", "How do you handle it when things don't go according to plan: do you pivot easily, or does it ruin your day?"),
+    ("The Guilt Text", 2, "It’s been three days. Responding now feels like admitting failure, so you just... don't.", "Who is someone you owe a response to right now, and why does the thought of replying feel so heavy?"),
+    ("Social Battery Dead", 3, "You are physically present, but your soul clocked out and went home an hour ago.", "What is your biggest 'tell' that your social battery is depleted, and do people around you respect it?"),
+    ("The Cringe Memory", 2, "You were trying to sleep, but your brain decided to replay that awkward thing you said 4 years ago.", "What is a past mistake you are still punishing yourself for, long after everyone else has forgotten?"),
+    ("Imposter Syndrome", 3, "You walked into the room and suddenly felt like a child wearing an adult's costume.", "In what area of your life do you feel like you are just 'faking it' right now?"),
+    ("Comparison Trap", 2, "You looked at their highlight reel and suddenly your actual life feels gray and boring.", "Who is someone you compare yourself to, and what do you think they have that you lack?"),
+    ("Forgot The Name", 2, "You know them. They know you. But their name is a total blank. The panic sets in.", "How comfortable are you with admitting when you don't know something or have made a mistake?"),
+    ("Visual Clutter", 2, "The laundry pile. The unwashed dish. It’s a constant, silent to-do list screaming at you.", "Does your physical environment reflect your mental state, or do you keep it tidy to hide the chaos inside?"),
+    ("Vague Symptom", 2, "A weird ache. You shouldn't Google it, but you will. Now you're convinced you're dying.", "When you feel vulnerable, do you tend to spiral into worst-case scenarios?"),
+    ("Decision Fatigue", 3, "'What’s for dinner?' The question feels like a math test you didn't study for.", "What is a decision you are currently procrastinating on because you are afraid of making the wrong choice?"),
+    ("The 'Sunday Scaries'", 3, "It’s 4 PM on a Sunday, and the shadow of Monday morning has already ruined your evening.", "What part of your upcoming week is taking up the most space in your brain right now?"),
+    ("Sensory Overload", 3, "The tag on your shirt itches. The lights are too bright. The chewing noise. It's too much.", "When the world gets too loud, what is your go-to method for recalibrating?"),
+    ("Unfinished Project", 2, "That hobby gear in the corner is judging you for not using it.", "Do you start things with enthusiasm and lose interest, or do you struggle to start at all?"),
+    ("Passive Aggressive Email", 3, "'Per my last email.' The professional equivalent of a knife fight.", "How do you handle conflict: do you address it head-on, or do you tend to be passive-aggressive?"),
+    ("Small Talk Loop", 2, "Having the exact same 'How are you?' 'Good, you?' conversation five times in an hour.", "Do you find it easier to connect with people deeply or superficially?"),
+    ("The 'Check Engine' Light", 3, "A literal or metaphorical warning light you are actively choosing to ignore.", "What is a problem in your life that you are currently ignoring in hopes that it goes away?"),
+    ("Diet Culture Guilt", 2, "You ate a cookie and your brain spent 20 minutes calculating how to 'pay for it.'", "How does your relationship with your body affect your daily mood?"),
+    ("Noise Pollution", 2, "Construction outside. A car alarm. You can't hear your own thoughts.", "Where do you go to find silence?"),
+    ("Analysis Paralysis", 3, "Too many options on the streaming service. You spend 45 minutes scrolling and watch nothing.", "Do you believe there is always a 'perfect' choice, or are you comfortable with 'good enough'?")
+]
+
+# --- DOWNPOUR (24 Unique) ---
+DOWNPOURS = [
+    ("Financial Tightrope", 7, True, "Math doesn't care about your feelings. You are one emergency away from zero.", "What does 'security' mean to you, and how far away do you feel from it right now?"),
+    ("The Recurring Fight", 8, True, "It started about dishes, but now you're screaming about things from 3 years ago.", "In our conflicts, what is one recurring pattern or trigger you wish we could break?"),
+    ("The Depression Nest", 6, True, "The physical manifestation of your mental state. The mess is winning.", "When you are at your lowest, what is the one thing you need from a partner to feel supported?"),
+    ("Total Burnout", 9, False, "You aren't just tired; you are empty. A hollow shell just going through the motions.", "If you could pause your life for one month with no consequences, what would you do with that time?"),
+    ("Medical Gaslighting", 8, False, "You know something is wrong. The doctors won't listen. You feel crazy.", "Have you ever felt misunderstood by an authority figure? How did that shape your ability to advocate for yourself?"),
+    ("Toxic Boss", 7, False, "Every notification triggers a fight-or-flight response. You are walking on eggshells.", "How much of your self-worth is tied to your productivity or your job title?"),
+    ("Social Isolation", 5, False, "You haven't seen a friend in months. You are slowly disappearing from people's lives.", "Do you pull away from people when you are struggling, or do you reach out?"),
+    ("Seasonal Depression", 6, True, "The sun went down at 4 PM and took your serotonin with it. Everything is gray.", "What is a non-negotiable routine that keeps you grounded when your mood slips?"),
+    ("Creative Drought", 5, False, "You used to have ideas. Now you just have static. The well is dry.", "When you feel uninspired, do you push through the block or do you wait for motivation to return?"),
+    ("Family Crisis", 7, True, "You have to go home and play the role they expect of you. It drains you to the bone.", "Which family member do you feel you have to 'perform' around the most?"),
+    ("Sleep Debt", 9, False, "Reality feels brittle. You are hallucinating shadow people. You physically hurt.", "What thoughts tend to keep you awake at night?"),
+    ("The Unexpected Bill", 8, True, "The car broke. The tooth broke. The bank account broke. Where will the money come from?", "How was money handled in your childhood home, and how does that affect your anxiety about bills today?"),
+    ("Pet Emergency", 7, True, "The vet bill is astronomical, but you have to pay it. It's family.", "What is the hardest decision you've ever had to make regarding a dependent (pet or person)?"),
+    ("Car Breakdown", 6, True, "Stranded on the side of the road. It's going to be expensive and inconvenient.", "Who is the first person you call in a crisis, and why them?"),
+    ("The Leak", 6, True, "Water is dripping from the ceiling. The landlord isn't answering. Panic sets in.", "When your physical environment feels unsafe or chaotic, how does it affect your mental state?"),
+    ("Data Loss", 5, False, "The hard drive failed. Years of work or memories, just gone in a blink.", "If you lost all your photos today, which specific memory would you be most terrified of forgetting?"),
+    ("Credit Fraud", 7, True, "Someone bought plane tickets with your card. Now you have to fight the bank.", "How do you handle feeling violated or taken advantage of?"),
+    ("Friend Breakup", 6, False, "No closure, just silence. It hurts worse than a romantic one.", "Is there a friendship you lost that you still grieve? What do you wish you had said?"),
+    ("Travel Nightmare", 5, True, "Stuck in an airport for 24 hours. No sleep, expensive food, pure misery.", "How do you behave when you are physically uncomfortable and exhausted?"),
+    ("Caregiver Fatigue", 8, True, "Taking care of aging parents or sick family. You have no time for yourself.", "Do you find it harder to ask for help or to accept help when it's offered?"),
+    ("Jury Duty", 5, False, "It couldn't have happened at a worse time at work. A mandated pause.", "How do you handle a total lack of control over your own schedule?"),
+    ("Home Infestation", 6, True, "Ants, mice, or bedbugs. Your safe space feels violated and dirty.", "What does having a 'safe space' mean to you?"),
+    ("Bureaucratic Hell", 5, False, "DMV, Insurance, Taxes. On hold for 4 hours just to be hung up on.", "What is your threshold for frustration before you snap?"),
+    ("Public Embarrassment", 5, False, "You went viral for the wrong reasons, or made a scene. The shame lingers.", "What is a past embarrassment that you still cringe at, and what would you tell that version of yourself now?")
+]
+
+# --- HURRICANE (17 Unique - ALL JOINT) ---
+HURRICANES = [
+    ("Grief (The Empty Chair)", 13, "The world feels smaller, quieter, and wrong without them. A hole in the universe.", "How has your relationship with grief changed as you've gotten older?"),
+    ("Identity Crisis", 12, "Who are you when you aren't being productive? You don't recognize yourself anymore.", "If you were stripped of your career and your roles, what would remain of you?"),
+    ("The Layoff", 13, "Security is an illusion. The ground is gone. The badge doesn't work anymore.", "When the ground falls out from under you, do you panic or do you go into survival mode?"),
+    ("Trust Breach", 10, "A lie was found out. The foundation cracked. Can we actually fix this?", "Is trust something that can be rebuilt once broken, or is it gone forever for you?"),
+    ("Chronic Illness", 12, "It isn't going away. This isn't a phase; this is just life now.", "How do you grieve the loss of the future you thought you were going to have?"),
+    ("Forced Relocation", 11, "Uprooting your life because you have no choice. You have to pack the boxes.", "What does 'home' mean to you? Is it a place, a person, or a feeling?"),
+    ("Natural Disaster", 13, "Nature is indifferent to your plans. Everything you own is wet or ash. Survival mode.", "If you had 5 minutes to leave your house forever, what non-living things would you take?"),
+    ("Legal Nightmare", 12, "Lawyers, paperwork, and the crushing weight of bureaucracy. The system is eating you.", "When you feel powerless against a system, do you fight back on principle or do you focus on self-preservation?"),
+    ("Identity Theft", 11, "Someone else is living your life, and they ruined your credit. Recovering yourself takes time.", "How much of your identity is tied to your reputation?"),
+    ("Existential Collapse", 12, "Why are we even doing this? Does any of it matter? The void stares back.", "If nothing matters, what is one reason you got out of bed today that is purely for you?"),
+    ("Emergency Surgery", 13, "Life changes in a heartbeat. The waiting room is cold and smells like antiseptic.", "If you knew you might not wake up, who is the one person in your life whose voice can actually cut through your internal panic?"),
+    ("The Eviction", 13, "You have 30 days to leave. Nowhere to go. The ultimate instability.", "What is your biggest fear regarding failure?"),
+    ("Addiction Relapse", 12, "The demon is back. It requires everything to fight it. Trust is fragile.", "What is a coping mechanism you use that you know isn't good for you?"),
+    ("The House Fire", 13, "You got out, but the memories didn't. Starting over from zero.", "How attached are you to material things, and could you start over if you had to?"),
+    ("Betrayal", 11, "It wasn't a mistake. They did it on purpose. The foundation is gone.", "Do you believe in revenge, or do you believe that the best revenge is living well?"),
+    ("False Accusation", 12, "You didn't do it, but proving it will cost you everything.", "What is more important to you: being right, or being at peace?"),
+    ("Societal Collapse", 11, "The world outside is burning, and it's unsafe to be who you are.", "In a crisis, are you the person who takes charge, or the person who helps others emotionally?")
+]
+
+# Every card in the game with a stable numeric ID (its index here). Records,
+# saved games and analytics refer to cards by this ID.
+CATALOG = (
+    [RainCard(t, w, 0, type="Shine", flavor_text=f, scenario=s) for t, w, f, s in SHINES] +
+    [RainCard(t, w, 1, type="Drizzle", flavor_text=f, scenario=s) for t, w, f, s in DRIZZLES] +
+    [RainCard(t, w, 2, is_joint=j, type="Downpour", flavor_text=f, scenario=s) for t, w, j, f, s in DOWNPOURS] +
+    [RainCard(t, w, 2, is_joint=True, type="Hurricane", flavor_text=f, scenario=s) for t, w, f, s in HURRICANES]
+)
+CARD_IDS = {c.title: i for i, c in enumerate(CATALOG)}
+
+def card_from_id(card_id):
+    return copy.copy(CATALOG[card_id])
+
+# How create_deck stacks the deck: `hurricanes` Hurricanes are shuffled into
+# the top `depth` cards and no others are dealt, and `shines` of the Shine
+# pool go into the deck. The default is the standard game; adaptive setups
+# (see adaptive.py) pick others.
+Stacking = namedtuple("Stacking", "hurricanes depth shines")
+DEFAULT_STACKING = Stacking(4, 10, 12)
+
+def create_deck(rng=random, stacking=DEFAULT_STACKING):
+    hurricanes, depth, shines = stacking
+    if not (0 <= hurricanes <= min(depth, len(HURRICANES)) and 0 <= shines <= len(SHINES)):
+        raise ValueError(f"Invalid deck stacking {stacking}.")
+    shines_data = list(SHINES)
+    rng.shuffle(shines_data)
+    drizzles_data = DRIZZLES
+    downpours_data = DOWNPOURS
+    hurricanes_data = list(HURRICANES)
+
+    # --- BUILD OBJECT LISTS ---
+
+    # Shuffle Hurricane data first, so we get random scenarios,
+    # but strictly slice only `hurricanes` for the entire game.
+    rng.shuffle(hurricanes_data)
+    active_hurricanes_data = hurricanes_data[:hurricanes]
+
+    shines_objs = [RainCard(t, w, 0, type="Shine", flavor_text=f, scenario=s) for t, w, f, s in shines_data[:shines]]
+    drizzles_objs = [RainCard(t, w, 1, type="Drizzle", flavor_text=f, scenario=s) for t, w, f, s in drizzles_data]
+    downpours_objs = [RainCard(t, w, 2, is_joint=j, type="Downpour", flavor_text=f, scenario=s) for t, w, j, f, s in downpours_data]
+
+    # Create Objects ONLY for the active hurricanes
+    hurricanes_objs = [RainCard(t, w, 2, is_joint=True, type="Hurricane", flavor_text=f, scenario=s) for t, w, f, s in active_hurricanes_data]
+
+    # --- FORCING FUNCTION: `hurricanes` HURRICANES TOTAL (4 by default) ---
+    # We do NOT add any remaining hurricanes to the pool.
+
+    # Create the pool of other cards
+    filler_pool = drizzles_objs + downpours_objs + shines_objs
+    rng.shuffle(filler_pool)
+
+    # We mix the Forced Hurricanes into the first filler cards.
+    # This creates a "Top Deck" of `depth` cards (10 by default) containing
+    # them. Since .pop() draws from the END of the list, "Top Deck" is appended last.
+
+    top_deck = hurricanes_objs + filler_pool[:depth - hurricanes]
+    rng.shuffle(top_deck)
+
+    bottom_deck = filler_pool[depth - hurricanes:]
+    rng.shuffle(bottom_deck)
+
+    final_deck = bottom_deck + top_deck
+    return final_deck
+
+def draw_card(deck, card_stats=None, rng=random, stacking=DEFAULT_STACKING):
+    if not deck: deck.extend(create_deck(rng, stacking))
+    c = deck.pop()
+    if card_stats is not None:
+        if c.type in card_stats:
+            card_stats[c.type] += 1
+    return c
+
+# --- 3. HELPER FUNCTIONS ---
+
+def calculate_vals(player, partner):
+    res_val = 0
+    if player.status == "Flow": res_val = 3
+    elif player.status == "Strained": res_val = 2
+    elif player.status == "Burnout": res_val = 2 if player.archetype == "Soloist" else 1
+
+    com_val = 0
+    if player.archetype == "Peacemaker":
+        com_val = 4 # UPDATED: Base is now 4
+        if partner.status == "Burnout": com_val = 5 # UPDATED: Bonus is 5
+    else:
+        if player.status == "Flow": com_val = 4 # UPDATED (Was 2)
+        elif player.status == "Strained": com_val = 3 # UPDATED (Was 1)
+        elif player.status == "Burnout": com_val = 0
+
+    self_val = 0
+    if player.archetype == "Soloist" and player.status == "Burnout": self_val = 1
+    else:
+        if player.status == "Flow": self_val = 3 # UPDATED (Was 1)
+        elif player.status == "Strained": self_val = 2
+        elif player.status == "Burnout": self_val = 3
+
+    if player.peacemaker_bonus_next:
+        res_val *= 2; com_val *= 2; self_val *= 2
+
+    return {"Resolve": res_val, "Comfort": com_val, "Self-Care": self_val}
+
+def get_assist_desc(archetype):
+    if archetype == "Soloist": return "SPACE (+4 Capacity)"
+    if archetype == "Atlas": return "VALIDATION (+4 Capacity)"
+    if archetype == "Peacemaker": return "PERMISSION (+2 Capacity, Next Action Doubled)"
+    if archetype == "Sprinter": return "PACING (Skip Rest)"
+    return "Help"
+
+def get_assist_name_only(archetype):
+    if archetype == "Soloist": return "SPACE"
+    if archetype == "Atlas": return "VALIDATION"
+    if archetype == "Peacemaker": return "PERMISSION"
+    if archetype == "Sprinter": return "PACING"
+    return "Help"
+
+# One character per committed player input, so a whole game's inputs pack
+# into a short string. Order choices, Absorb amounts and the non-action
+# inputs sit alongside the action codes used by apply_action.
+ACTION_CODES = {"resolve_self": "m", "resolve_partner": "p", "comfort": "c", "self_care": "h", "assist": "a", "sprint": "x"}
+INPUT_CODES = {"rest": "r", "claim_shine": "s", "end_turn": "e", "absorb_0": "0", "absorb_1": "1", "absorb_2": "2"}
+INPUT_CODES.update(ACTION_CODES)
+# "Seat N acts first"; seats 1 and 2 keep the two-player codes f / g.
+FIRST_CODES = "fgijkl"
+INPUT_CODES.update({f"first_p{i + 1}": ch for i, ch in enumerate(FIRST_CODES)})
+
+def log(g, msg):
+    g.log.append(f"Turn {g.turn} | {msg}")
+
+def state_key(g):
+    # Cheap fingerprint of a game position: every committed action appends to
+    # the log, draws shrink the deck, and phase/queue cover the rest.
+    return (g.turn, g.phase, g.resolved, len(g.deck), len(g.log), tuple(g.actor_queue), g.sprint_actions)
+
+# --- 4. GAME FLOW ---
+
+def new_table(names, archetypes, rolls, seed=None, deck=None, stacking=None):
+    # A fresh seed is drawn when none is given so every game can be replayed.
+    # Passing `deck` (e.g. an imported game without a seed) skips create_deck.
+    if not MIN_PLAYERS <= len(names) <= MAX_PLAYERS:
+        raise ValueError(f"A table seats {MIN_PLAYERS} to {MAX_PLAYERS} players, not {len(names)}.")
+    if seed is None and deck is None: seed = random.randrange(2**63)
+    rng = random.Random(seed)
+    players = [Player(n, a, capacity=r) for n, a, r in zip(names, archetypes, rolls)]
+    for p in players:
+        p.init_stats()
+        p.update_status()
+
+    # Deck Creation & Stacking
+    stacking = Stacking(*stacking) if stacking else DEFAULT_STACKING
+    full_deck = create_deck(rng, stacking) if deck is None else list(deck)
+    start_deck = [CARD_IDS[c.title] for c in full_deck]
+
+    # Extract one Drizzle per player for Setup
+    setup_cards = []
+    temp_storage = []
+
+    # Note: Because we stacked Hurricanes at the TOP (end of list),
+    # we must be careful not to pop them if we are looking for Drizzles.
+    # This loop handles it by putting non-drizzles into temp_storage
+    # and then putting them back.
+
+    while len(setup_cards) < len(players) and full_deck:
+        c = full_deck.pop()
+        if c.type == "Drizzle":
+            setup_cards.append(c)
+        else:
+            temp_storage.append(c)
+
+    for c in reversed(temp_storage):
+        full_deck.append(c)
+
+    for p, c in zip(players, setup_cards):
+        p.active_card = c
+
+    g = GameState(players, full_deck, rng=rng, seed=seed, rolls=tuple(rolls), start_deck=start_deck, stacking=stacking)
+    g.card_stats["Drizzle"] += len(setup_cards)
+    g.draws.extend(CARD_IDS[c.title] for c in setup_cards)
+    g.series.sample(g, 0)
+    return g
+
+def new_game(n1, a1, r1, n2, a2, r2, seed=None, deck=None):
+    # Two-player table.
+    return new_table([n1, n2], [a1, a2], [r1, r2], seed=seed, deck=deck)
+
+def game_result(g):
+    # Returns (game_over, victory, fail_msg)
+    game_over = False
+    victory = False
+    fail_msg = ""
+
+    for p in g.players:
+        if p.capacity <= 0 or p.burnout_tokens >= 3:
+            game_over = True
+            seat, burnout = losing_seat(g)
+            p = g.players[seat]
+            if burnout: fail_msg = f"{p.name} accumulated too much Burnout."
+            else: fail_msg = f"{p.name} ran out of emotional capacity."
+            break
+
+    if g.resolved >= 10:
+        game_over = True
+        victory = True
+    return game_over, victory, fail_msg
+
+def losing_seat(g):
+    # (seat, burnout) of the player who lost the game, or None. Running out of
+    # capacity is checked round the whole table before Burnout.
+    for i, p in enumerate(g.players):
+        if p.capacity <= 0: return i, False
+    for i, p in enumerate(g.players):
+        if p.burnout_tokens >= 3: return i, True
+    return None
+
+def draw(g):
+    c = draw_card(g.deck, g.card_stats, g.rng, g.stacking)
+    g.draws.append(CARD_IDS[c.title])
+    return c
+
+def run_setup(g):
+    # Refill empty hands. Stops early when a Shine is drawn.
+    for pid, p in enumerate(g.players):
+        if p.active_card is None:
+            c = draw(g)
+            if c.type == "Shine":
+                g.pending_shine = c
+                g.shine_actor = pid
+                g.phase = "Shine"
+                g.return_to_setup = True
+                return
+            p.active_card = c
+    g.phase = "Strategy"
+
+def advance(g):
+    # Run the phases that need no player input until the game waits on one.
+    while not game_result(g)[0]:
+        if g.phase == "Setup":
+            run_setup(g)
+        elif g.phase == "Action" and not g.actor_queue:
+            g.phase = "Atlas_Intervention"
+        elif g.phase == "Atlas_Intervention" and atlas_opportunity(g)[2] <= 0:
+            g.phase = "Exhaust"
+        else:
+            return
+
+def claim_shine(g):
+    g.actions.append(INPUT_CODES["claim_shine"])
+    shine = g.pending_shine
+    actor = g.player(g.shine_actor)
+    old_cap = actor.capacity
+    actor.mod_capacity(shine.weight)
+    log(g, f"{actor.name} ({actor.archetype}) claims {shine.title}. Capacity {old_cap} -> {actor.capacity}.")
+
+    new_c = draw(g)
+    if new_c.type == "Shine":
+        g.pending_shine = new_c
+        return
+    actor.active_card = new_c
+    g.pending_shine = None
+
+    if g.return_to_setup:
+        g.phase = "Setup"
+        g.return_to_setup = False
+    elif g.sprint_actions > 0:
+        g.phase = "Action"
+    elif g.actor_queue:
+        g.phase = "Action"
+    else:
+        g.phase = "Atlas_Intervention"
+
+def choose_order(g, first):
+    # `first` acts, then play passes to the left round the table.
+    n = len(g.players)
+    g.actions.append(FIRST_CODES[first])
+    g.actor_queue = [(first + i) % n for i in range(n)]
+    g.phase = "Action"
+
+def must_rest(g):
+    actor = g.player(g.actor_queue[0])
+    return actor.sprinter_resting and g.sprint_actions == 0
+
+def take_rest(g):
+    g.actions.append(INPUT_CODES["rest"])
+    actor = g.player(g.actor_queue[0])
+    old_cap = actor.capacity
+    actor.mod_capacity(1)
+    actor.sprinter_resting = False
+    log(g, f"{actor.name} ({actor.archetype}) takes Active Recovery. Capacity {old_cap} -> {actor.capacity}.")
+    g.actor_queue.pop(0)
+
+def action_options(g):
+    # (label, action code) pairs for the current actor; code is None when locked.
+    actor_id = g.actor_queue[0]
+    actor = g.player(actor_id)
+    partner = g.partner_of(actor_id)
+    vals = calculate_vals(actor, partner)
+    opts = []
+
+    if actor.active_card: opts.append((f"Resolve my Rain Card (-{vals['Resolve']} Weight)", "resolve_self"))
+    else: opts.append(("Resolve (No Card - Invalid)", None))
+
+    if partner.active_card:
+        if actor.archetype == "Soloist" and actor.status != "Flow": opts.append(("Resolve Partner (LOCKED: Soloist needs Flow)", None))
+        else: opts.append((f"Resolve {partner.name}'s Rain Card (-{vals['Resolve']} Weight)", "resolve_partner"))
+    else: opts.append(("Resolve Partner (No Card)", None))
+
+    if actor.archetype == "Soloist":
+        opts.append(("Comfort Partner (LOCKED: Soloist Weakness)", None))
+    elif vals['Comfort'] > 0:
+        opts.append((f"Comfort {partner.name} (+{vals['Comfort']} Capacity)", "comfort"))
+    else:
+        opts.append(("Comfort Partner (LOCKED: Burnout)", None))
+
+    opts.append((f"Self-Care (+{vals['Self-Care']} Capacity)", "self_care"))
+
+    if not g.sprinter_did_assist:
+        if actor.assists_used < 8:
+            charges = 8 - actor.assists_used
+            opts.append((f"Assist {partner.name} (Effect: {get_assist_desc(partner.archetype)}) - {charges}/8 Left", "assist"))
+        else:
+            opts.append(("Assist (LOCKED: 0/8 Charges)", None))
+
+    if actor.archetype == "Sprinter" and g.sprint_actions == 0:
+        opts.append(("⚡ SPRINT (Perform 2 Actions)", "sprint"))
+    return opts
+
+def resolve_card(g, actor, owner, amount):
+    old_w = owner.active_card.weight
+    owner.active_card.weight -= amount
+    if owner is actor:
+        log(g, f"{actor.name} ({actor.archetype}) resolves '{owner.active_card.title}'. Weight {old_w} -> {owner.active_card.weight}.")
+    else:
+        log(g, f"{actor.name} ({actor.archetype}) resolves partner's '{owner.active_card.title}'. Weight {old_w} -> {owner.active_card.weight}.")
+    if owner.active_card.weight <= 0:
+
+        bonus = 0
+        if owner.active_card.type == "Downpour": bonus = 1
+        elif owner.active_card.type == "Hurricane": bonus = 2
+
+        owner.active_card = None
+        g.resolved += 1
+
+        if bonus > 0:
+            owner.mod_capacity(bonus)
+            log(g, f"✅ Card Resolved! {owner.name} gets +{bonus} Capacity.")
+        else:
+            log(g, f"✅ Card Resolved! (No Bonus).")
+
+def apply_action(g, code):
+    actor_id = g.actor_queue[0]
+    actor = g.player(actor_id)
+    partner = g.partner_of(actor_id)
+    vals = calculate_vals(actor, partner)
+    g.actions.append(ACTION_CODES[code])
+
+    if code == "sprint":
+        g.sprint_actions = 2
+        if actor.pacing_buff:
+            actor.pacing_buff = False
+            log(g, f"🏃 {actor.name} uses PACING to Sprint without fatigue!")
+        else:
+            actor.sprinter_resting = True
+        log(g, f"{actor.name} ({actor.archetype}) activates SPRINT! (2 Actions).")
+        return
+
+    consumed_bonus = False
+
+    if code == "resolve_self":
+        resolve_card(g, actor, actor, vals['Resolve'])
+        consumed_bonus = True
+
+    elif code == "resolve_partner":
+        resolve_card(g, actor, partner, vals['Resolve'])
+        consumed_bonus = True
+
+    elif code == "comfort":
+        old_cap = partner.capacity
+        partner.mod_capacity(vals['Comfort'])
+        log(g, f"{actor.name} ({actor.archetype}) COMFORTS {partner.name}. {partner.name} Capacity {old_cap} -> {partner.capacity}.")
+        consumed_bonus = True
+
+    elif code == "self_care":
+        old_cap = actor.capacity
+        actor.mod_capacity(vals['Self-Care'])
+        log(g, f"{actor.name} ({actor.archetype}) SELF-CARES. Capacity {old_cap} -> {actor.capacity}.")
+        # REMOVED: Soloist penalty
+        consumed_bonus = True
+
+    elif code == "assist":
+        actor.assists_used += 1
+        if g.sprint_actions > 0: g.sprinter_did_assist = True
+
+        assist_name = get_assist_name_only(partner.archetype)
+        p_old = partner.capacity
+
+        # UPDATED ASSIST VALUES HERE
+        if partner.archetype == "Soloist": partner.mod_capacity(4); partner.assist_buff="Space"
+        elif partner.archetype == "Atlas": partner.mod_capacity(4); partner.assist_buff="Validation"
+        elif partner.archetype == "Peacemaker":
+            partner.mod_capacity(2);
+            partner.peacemaker_bonus_next=True
+            partner.assist_buff="Permission"
+        elif partner.archetype == "Sprinter":
+            partner.assist_buff="Pacing"
+            partner.pacing_buff = True
+            partner.sprinter_resting = False
+
+        log(g, f"{actor.name} ({actor.archetype}) ASSISTS {partner.name} ({partner.archetype}) with {assist_name}. {partner.name} Capacity {p_old} -> {partner.capacity}. (Charges: {actor.assists_used}/8)")
+
+    if actor.peacemaker_bonus_next and consumed_bonus:
+        actor.peacemaker_bonus_next = False
+
+    if g.sprint_actions > 0:
+        g.sprint_actions -= 1
+
+    if g.sprint_actions == 0:
+        g.actor_queue.pop(0)
+        g.sprinter_did_assist = False
+
+def atlas_opportunity(g):
+    # Returns (atlas_player, partner_player, pending_dmg). The first Atlas in
+    # seat order who is off cooldown and whose partner has damage coming may
+    # shield that partner; an Atlas whose partner is safe passes the chance on.
+    n = len(g.players)
+    for pid, atlas_player in enumerate(g.players):
+        if atlas_player.archetype != "Atlas" or atlas_player.atlas_cooldown: continue
+        partner_id = (pid + 1) % n
+        pending_dmg = pending_damage(g, partner_id)
+        if pending_dmg > 0: return atlas_player, g.players[partner_id], pending_dmg
+    return None, None, 0
+
+def pending_damage(g, pid):
+    # The seat's own Exhaust plus joint stress from the cards either side of it.
+    p = g.players[pid]
+    pending_dmg = p.active_card.exhaust_value() if p.active_card else 0
+    for j in g.neighbours(pid):
+        c = g.players[j].active_card
+        if c and c.is_joint: pending_dmg += 1
+    return pending_dmg
+
+def set_absorb(g, amt):
+    g.actions.append(INPUT_CODES[f"absorb_{amt}"])
+    atlas_player, partner_player, _ = atlas_opportunity(g)
+    atlas_player.pending_absorb = amt
+    if amt > 0: log(g, f"🛡️ {atlas_player.name} prepares to ABSORB {amt} damage for {partner_player.name}.")
+    g.phase = "Exhaust"
+
+def resolve_exhaust(g):
+    # End-of-turn damage, status and stress. Returns the damage dealt to each
+    # seat. Every step is one pass over the table, so the cost grows linearly
+    # with the number of players.
+    players = g.players
+    n = len(players)
+    nbrs = NEIGHBOURS[n]
+    card_damage = g.card_damage
+    dmg = [0] * n
+    joint = [False] * n
+
+    for i in range(n):
+        p = players[i]
+        c = p.active_card
+        if c is not None:
+            d = c.exhaust_value()
+            dmg[i] += d
+            if c.is_joint:
+                joint[i] = True
+                d += len(nbrs[i])
+            # Attribute each card's Exhaust (plus the joint stress it puts on
+            # the neighbours) before absorbs and mitigation are applied.
+            cid = CARD_IDS[c.title]
+            card_damage[cid] = card_damage.get(cid, 0) + d
+        if p.pending_absorb > 0:
+            dmg[i] += p.pending_absorb; dmg[(i + 1) % n] -= p.pending_absorb
+            p.atlas_cooldown = True; p.pending_absorb = 0
+        else: p.atlas_cooldown = False
+
+    # Joint cards stress the players either side of them. A Peacemaker who
+    # sees a neighbour take a heavy hit (3+ before joint stress) feels that
+    # instead. Two-player tables keep the original rule's order, where seat 2
+    # sees seat 1's damage after seat 1's joint stress, so their games are
+    # unchanged; larger tables judge every neighbour the same way.
+    for i in range(n):
+        if dmg[i] < 0: dmg[i] = 0
+    hit = dmg[:] if n > 2 else dmg
+    for i in range(n):
+        p = players[i]
+        if p.archetype == "Peacemaker" and any(hit[j] >= 3 for j in nbrs[i]):
+            p.mod_capacity(-1)
+            log(g, f"💔 {p.name} (Peacemaker) feels pain from partner's high damage. (-1 Capacity)")
+        else:
+            for j in nbrs[i]:
+                if joint[j]: dmg[i] += 1
+
+    for i, p in enumerate(players):
+        if p.archetype == "Atlas" and p.status == "Flow" and dmg[i] > 0:
+            dmg[i] -= 1
+            log(g, f"🛡️ {p.name} (Atlas) Pain Tolerance reduces damage by 1.")
+
+    for i, p in enumerate(players):
+        if dmg[i] > 0:
+            old_c = p.capacity
+            p.mod_capacity(-dmg[i])
+            log(g, f"💥 {p.name} takes {dmg[i]} Exhaust Damage. Capacity {old_c} -> {p.capacity}.")
+        else:
+            log(g, f"🛡️ {p.name} takes 0 damage.")
+
+    for p in players:
+        p.update_status()
+        if p.archetype == "Sprinter" and p.pacing_buff:
+            p.assist_buff = "Pacing"
+        elif p.archetype == "Peacemaker" and p.peacemaker_bonus_next:
+            p.assist_buff = "Permission"
+        else:
+            p.assist_buff = None
+
+        if p.status == "Burnout":
+            p.burnout_tokens += 1
+            p.total_burnout_gained += 1
+        else: p.burnout_tokens = 0
+
+        if p.active_card:
+            p.active_card.age += 1
+            if p.active_card.age >= 3:
+                p.active_card.accumulated_tokens += 1
+                log(g, f"⚠️ STRESS ACCUMULATED: {p.name}'s card rots! +1 Token (Total: {p.active_card.accumulated_tokens})")
+    return dmg
+
+def end_turn(g):
+    g.actions.append(INPUT_CODES["end_turn"])
+    absorb = [p.pending_absorb for p in g.players]
+    dmg = resolve_exhaust(g)
+    g.series.sample(g, g.turn, dmg, absorb)
+    g.turn += 1
+    g.phase = "Setup"
+    return dmg
+
+INPUT_NAMES = {v: k for k, v in INPUT_CODES.items()}
+
+def apply_input(g, ch):
+    # Replays one recorded input, then runs the automatic phases after it.
+    name = INPUT_NAMES[ch]
+    if name in ACTION_CODES: apply_action(g, name)
+    elif name.startswith("first_"): choose_order(g, int(name[len("first_p"):]) - 1)
+    elif name.startswith("absorb_"): set_absorb(g, int(name[-1]))
+    elif name == "rest": take_rest(g)
+    elif name == "claim_shine": claim_shine(g)
+    elif name == "end_turn": end_turn(g)
+    advance(g)
+
+def legal_inputs(g):
+    # Input codes the current position accepts; the choice points of the UI.
+    if g.phase == "Shine": return [INPUT_CODES["claim_shine"]]
+    if g.phase == "Strategy": return list(FIRST_CODES[:len(g.players)])
+    if g.phase == "Action":
+        if must_rest(g): return [INPUT_CODES["rest"]]
+        return [ACTION_CODES[code] for _, code in action_options(g) if code]
+    if g.phase == "Atlas_Intervention":
+        return [INPUT_CODES[f"absorb_{i}"] for i in range(min(2, atlas_opportunity(g)[2]) + 1)]
+    if g.phase == "Exhaust": return [INPUT_CODES["end_turn"]]
+    return []
+
+def acting_seat(g):
+    # Seat whose decision the next input is, or -1 for table-wide inputs
+    # (turn order, ending the turn).
+    if g.phase == "Action" and g.actor_queue: return g.actor_queue[0]
+    if g.phase == "Shine": return g.shine_actor
+    if g.phase == "Atlas_Intervention":
+        atlas_player = atlas_opportunity(g)[0]
+        if atlas_player: return g.players.index(atlas_player)
+    return -1
+
+def loss_code(seat, burnout):
+    # Seats 1-2 keep the two-player codes (capacity 2/3, burnout 4/5); later
+    # seats continue in pairs from 6 (seat 3: capacity 6, burnout 7, ...).
+    if seat < 2: return 2 + seat + (2 if burnout else 0)
+    return 6 + 2 * (seat - 2) + (1 if burnout else 0)
+
+def outcome_code(g):
+    # 0 still running, 1 victory, otherwise loss_code of the losing seat
+    game_over, victory, _ = game_result(g)
+    if not game_over: return 0
+    if victory: return 1
+    return loss_code(*losing_seat(g))
+
+# --- 5. SPECULATION ---
+
+def fork(g):
+    # Detached copy for what-if evaluation. The log is history only, so a
+    # shallow copy of it is enough and keeps forks cheap on long games.
+    log_lines, g.log = g.log, []
+    try:
+        h = copy.deepcopy(g)
+    finally:
+        g.log = log_lines
+    h.log = list(log_lines)
+    return h
+
+def preview_exhaust(g):
+    # Damage each seat would take if the turn ended with the current cards.
+    h = fork(g)
+    dmg = resolve_exhaust(h)
+    return {"damage": dmg, "capacity": [p.capacity for p in h.players]}
+
+def speculate(g):
+    # Precompute the positions reachable from the Strategy phase, keyed by
+    # state_key so the next rerun can look up its own position directly.
+    out = {}
+    for first in range(len(g.players)):
+        h = fork(g)
+        choose_order(h, first)
+        actor = h.player(first)
+        partner = h.partner_of(first)
+        out[state_key(h)] = {
+            "vals": calculate_vals(actor, partner),
+            "options": action_options(h),
+        }
+    out[("exhaust_preview",) + state_key(g)] = preview_exhaust(g)
+    return out
@@ -0,0 +1,216 @@
+import base64
+import binascii
+from engine import (
+    ARCHETYPES, CATALOG, CARD_IDS, MAX_PLAYERS, SEED_LIMIT, DEFAULT_STACKING, TurnSeries, card_from_id, new_table, draw_card, log,
+    game_result, atlas_opportunity,
+)
+
+# Shareable game links: the live game state bit-packed into a short URL-safe
+# token, so a game can be resumed on any device with no server-side storage.
+#
+#   token = base64url(u8 version | bit-packed state | u16 CRC-16 of the bytes before it)
+#
+# The deck is not stored card by card. It is the seed plus the number of
+# cards drawn so far (and the stacking, for adaptive games): new_table(seed)
+# followed by that many draws rebuilds the deck order, the refill RNG and the
+# card counts exactly. Everything else a decision can depend on is stored
+# field by field (see _write_state).
+#
+# History is not part of the state: a resumed game starts with an empty log,
+# no recorded inputs and charts that begin at the resumed turn, so it cannot
+# be exported as a replayable record.
+# Games dealt from an explicit deck (seed None) cannot be linked, nor can
+# seeds outside the stored u64 range.
+#
+# The CRC only catches accidental damage; anyone can build a token with a
+# valid checksum. Decoding therefore bounds the redraw work (MAX_DRAWS) and
+# every count (LIMIT), and rejects positions play can never reach before the
+# app sees them.
+
+LINK_VERSION = 2 # 2: deck stacking after the seats
+PHASES = ["Setup", "Strategy", "Action", "Atlas_Intervention", "Exhaust", "Shine"]
+STATUSES = ["Flow", "Strained", "Burnout"]
+ASSIST_BUFFS = [None, "Space", "Validation", "Permission", "Pacing"]
+CARD_BITS = (len(CATALOG) - 1).bit_length()
+SEAT_BITS = (MAX_PLAYERS - 1).bit_length()
+MAX_DRAWS = 256 # Four standard decks; a game is decided long before (self-play never passes 25)
+LIMIT = 999 # Bound on every other count, far beyond play and well inside TurnSeries' int16 columns
+
+# --- 1. BIT STREAM ---
+
+class BitWriter:
+    def __init__(self):
+        self.acc = 0
+        self.n = 0
+
+    def bits(self, value, width):
+        self.acc |= (value & ((1 << width) - 1)) << self.n
+        self.n += width
+
+    def flag(self, value):
+        self.bits(1 if value else 0, 1)
+
+    def uint(self, value):
+        # 4 data bits and a continue bit per group: 0-15 cost 5 bits.
+        while True:
+            more = value > 15
+            self.bits(value & 15 | (16 if more else 0), 5)
+            value >>= 4
+            if not more: return
+
+    def sint(self, value):
+        self.uint(value * 2 if value >= 0 else -value * 2 - 1) # zigzag
+
+    def text(self, s):
+        raw = s.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+        self.uint(len(raw))
+        for b in raw: self.bits(b, 8)
+
+    def getvalue(self):
+        return self.acc.to_bytes((self.n + 7) // 8, "little")
+
+class BitReader:
+    def __init__(self, data):
+        self.acc = int.from_bytes(data, "little")
+        self.left = len(data) * 8
+
+    def bits(self, width):
+        if width > self.left: raise ValueError("Game link is truncated.")
+        value = self.acc & ((1 << width) - 1)
+        self.acc >>= width
+        self.left -= width
+        return value
+
+    def flag(self):
+        return self.bits(1) == 1
+
+    def uint(self, limit=None):
+        value = shift = 0
+        while True:
+            group = self.bits(5)
+            value |= (group & 15) << shift
+            shift += 4
+            if not group & 16: break
+        if limit is not None and value > limit: raise ValueError("Game link holds an impossible state.")
+        return value
+
+    def sint(self, limit=None):
+        z = self.uint(None if limit is None else 2 * limit)
+        return z >> 1 if not z & 1 else -(z >> 1) - 1
+
+    def text(self):
+        return bytes(self.bits(8) for _ in range(self.uint())).decode("utf-8")
+
+    def pick(self, table, width):
+        i = self.bits(width)
+        if i >= len(table): raise ValueError("Game link holds an unknown value.")
+        return table[i]
+
+# --- 2. STATE LAYOUT ---
+
+def _write_state(w, g):
+    w.bits(g.seed, 64)
+    w.bits(len(g.players), SEAT_BITS)
+    for p, r in zip(g.players, g.rolls):
+        w.bits(ARCHETYPES.index(p.archetype), 2); w.uint(r); w.text(p.name)
+    w.flag(g.stacking != DEFAULT_STACKING)
+    if g.stacking != DEFAULT_STACKING:
+        for v in g.stacking: w.uint(v)
+    w.uint(g.turn); w.bits(PHASES.index(g.phase), 3); w.uint(g.resolved); w.uint(len(g.draws))
+    w.uint(len(g.actor_queue))
+    for pid in g.actor_queue: w.bits(pid, SEAT_BITS)
+    w.uint(g.sprint_actions); w.flag(g.sprinter_did_assist); w.flag(g.return_to_setup)
+    w.flag(g.pending_shine)
+    if g.pending_shine: w.bits(CARD_IDS[g.pending_shine.title], CARD_BITS)
+    w.flag(g.shine_actor is not None)
+    if g.shine_actor is not None: w.bits(g.shine_actor, SEAT_BITS)
+    for p in g.players:
+        w.sint(p.capacity); w.sint(p.min_cap); w.sint(p.max_cap)
+        w.uint(p.burnout_tokens); w.uint(p.total_burnout_gained); w.uint(p.assists_used)
+        w.bits(STATUSES.index(p.status), 2); w.bits(ASSIST_BUFFS.index(p.assist_buff), 3); w.uint(p.pending_absorb)
+        w.flag(p.sprinter_resting); w.flag(p.pacing_buff); w.flag(p.atlas_cooldown); w.flag(p.peacemaker_bonus_next)
+        c = p.active_card
+        w.flag(c)
+        if c:
+            w.bits(CARD_IDS[c.title], CARD_BITS)
+            w.sint(c.weight); w.uint(c.age); w.uint(c.accumulated_tokens); w.flag(c.discussed)
+
+def _read_state(r, version):
+    seed = r.bits(64)
+    n = r.bits(SEAT_BITS)
+    if not 2 <= n <= MAX_PLAYERS: raise ValueError("Game link holds an unknown value.")
+    archetypes, rolls, names = [], [], []
+    for _ in range(n):
+        archetypes.append(ARCHETYPES[r.bits(2)]); rolls.append(r.uint(LIMIT)); names.append(r.text())
+    stacking = [r.uint(LIMIT) for _ in DEFAULT_STACKING] if version >= 2 and r.flag() else None
+    g = new_table(names, archetypes, rolls, seed=seed, stacking=stacking)
+
+    g.turn = r.uint(LIMIT); g.phase = r.pick(PHASES, 3); g.resolved = r.uint(LIMIT)
+    # Redraw to the same point so the deck, its refills and card_stats match.
+    draws = r.uint(MAX_DRAWS)
+    if draws < len(g.draws): raise ValueError("Game link holds an impossible state.")
+    for _ in range(draws - len(g.draws)):
+        g.draws.append(CARD_IDS[draw_card(g.deck, g.card_stats, g.rng, g.stacking).title])
+    g.actor_queue = [_seat(r, n) for _ in range(r.uint(n))]
+    g.sprint_actions = r.uint(2); g.sprinter_did_assist = r.flag(); g.return_to_setup = r.flag()
+    g.pending_shine = _card(r) if r.flag() else None
+    g.shine_actor = _seat(r, n) if r.flag() else None
+    for p in g.players:
+        p.capacity = r.sint(LIMIT); p.min_cap = r.sint(LIMIT); p.max_cap = r.sint(LIMIT)
+        p.burnout_tokens = r.uint(LIMIT); p.total_burnout_gained = r.uint(LIMIT); p.assists_used = r.uint(LIMIT)
+        p.status = r.pick(STATUSES, 2); p.assist_buff = r.pick(ASSIST_BUFFS, 3); p.pending_absorb = r.uint(2)
+        p.sprinter_resting = r.flag(); p.pacing_buff = r.flag(); p.atlas_cooldown = r.flag(); p.peacemaker_bonus_next = r.flag()
+        p.active_card = None
+        if r.flag():
+            c = p.active_card = _card(r)
+            c.weight = r.sint(LIMIT); c.age = r.uint(LIMIT); c.accumulated_tokens = r.uint(LIMIT); c.discussed = r.flag()
+    _check_state(g)
+    g.series = TurnSeries(n)
+    g.series.sample(g, g.turn - 1)
+    return g
+
+def _check_state(g):
+    # Positions the engine never stops in, each of which the app would fail on.
+    over = game_result(g)[0]
+    if g.turn < 1: bad = True
+    elif g.phase == "Setup": bad = not over # Setup runs straight through to Strategy or Shine
+    elif g.phase == "Action": bad = not g.actor_queue
+    elif g.phase == "Shine": bad = g.pending_shine is None or g.shine_actor is None or g.pending_shine.type != "Shine"
+    elif g.phase == "Atlas_Intervention": bad = atlas_opportunity(g)[2] <= 0
+    else: bad = False
+    if bad: raise ValueError("Game link holds an impossible state.")
+
+def _seat(r, n):
+    pid = r.bits(SEAT_BITS)
+    if pid >= n: raise ValueError("Game link holds an unknown value.")
+    return pid
+
+def _card(r):
+    card_id = r.bits(CARD_BITS)
+    if card_id >= len(CATALOG): raise ValueError("Game link holds an unknown value.")
+    return card_from_id(card_id)
+
+# --- 3. TOKENS ---
+
+def encode_state(g):
+    if g.seed is None: raise ValueError("Games dealt from an explicit deck cannot be linked.")
+    if not 0 <= g.seed < SEED_LIMIT: raise ValueError(f"Only seeds from 0 to {SEED_LIMIT - 1} can be linked.")
+    w = BitWriter()
+    _write_state(w, g)
+    body = bytes([LINK_VERSION]) + w.getvalue()
+    token = body + binascii.crc_hqx(body, 0).to_bytes(2, "little")
+    return base64.urlsafe_b64encode(token).rstrip(b"=").decode("ascii")
+
+def decode_state(token):
+    # Raises ValueError for anything that is not an intact link of a known version.
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError("Game link is not valid.")
+    if len(raw) < 3: raise ValueError("Game link is truncated.")
+    body, crc = raw[:-2], int.from_bytes(raw[-2:], "little")
+    if binascii.crc_hqx(body, 0) != crc: raise ValueError("Game link is damaged (checksum mismatch).")
+    if not 1 <= body[0] <= LINK_VERSION: raise ValueError(f"Unsupported game link version {body[0]}.")
+    g = _read_state(BitReader(body[1:]), body[0])
+    log(g, "Game resumed from a shared link.")
+    return g
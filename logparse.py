@@ -0,0 +1,372 @@
+import argparse
+import os
+import re
+import struct
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import List, NamedTuple, Optional
+from engine import ARCHETYPES, ACTION_CODES, INPUT_CODES, FIRST_CODES, MIN_PLAYERS, MAX_PLAYERS, loss_code
+from records import RECORD_VERSION, CARD_TYPES, JsonlWriter, PackedWriter, open_archive, pack_record
+
+# Streaming parser for pasted "Copy Game Log & Stats" reports (views.game_report).
+#
+# iter_games() reads any iterable of lines and yields one ParsedGame per report,
+# so files of any size stream through in constant memory. Several reports may
+# be concatenated in one file, the "> " prefix of the on-screen log is accepted,
+# and lines that match nothing are counted as malformed rather than raising.
+# A game whose players cannot be matched to seats is skipped, not raised.
+#
+# ParsedGame.to_record() produces the records.py format. Text logs carry no
+# seed or deck order, so these records hold setup, inputs and stats only and
+# cannot be replayed; inputs that leave no log line (an Absorb of 0) are absent.
+
+_ARCH = "(Soloist|Sprinter|Atlas|Peacemaker)"
+_NUM = r"(-?\d+)"
+
+RE_LOG = re.compile(r"^Turn (\d+) \| (.*)$")
+RE_PLAYER = re.compile(rf"^(.+) \({_ARCH}\):$")
+RE_START = re.compile(rf"^  - Capacity: Start {_NUM}, End {_NUM}$")
+RE_HIGH_LOW = re.compile(rf"^  - High/Low Cap: {_NUM} / {_NUM}$")
+RE_BURNOUT = re.compile(r"^  - Total Burnout Accumulated: (\d+)$")
+RE_ASSISTS = re.compile(r"^  - Assists Used: (\d+)/8$")
+RE_CARD_COUNT = re.compile(r"^  (Drizzle|Downpour|Hurricane|Shine): (\d+)$")
+
+RE_RESOLVE = re.compile(rf"^(.+?) \({_ARCH}\) resolves (partner's )?'(.+)'\. Weight {_NUM} -> {_NUM}\.$")
+RE_CARD_RESOLVED = re.compile(r"^✅ Card Resolved! (?:(.+) gets \+(\d+) Capacity\.|\(No Bonus\)\.)$")
+RE_COMFORT = re.compile(rf"^(.+?) \({_ARCH}\) COMFORTS (.+)\. \3 Capacity {_NUM} -> {_NUM}\.$")
+RE_SELF_CARE = re.compile(rf"^(.+?) \({_ARCH}\) SELF-CARES\. Capacity {_NUM} -> {_NUM}\.$")
+RE_ASSIST = re.compile(rf"^(.+?) \({_ARCH}\) ASSISTS (.+) \({_ARCH}\) with (\w+)\. \3 Capacity {_NUM} -> {_NUM}\. \(Charges: (\d+)/8\)$")
+RE_REST = re.compile(rf"^(.+?) \({_ARCH}\) takes Active Recovery\. Capacity {_NUM} -> {_NUM}\.$")
+RE_SPRINT = re.compile(rf"^(.+?) \({_ARCH}\) activates SPRINT! \(2 Actions\)\.$")
+RE_PACING = re.compile(r"^🏃 (.+) uses PACING to Sprint without fatigue!$")
+RE_CLAIM = re.compile(rf"^(.+?) \({_ARCH}\) claims (.+)\. Capacity {_NUM} -> {_NUM}\.$")
+RE_ABSORB = re.compile(r"^🛡️ (.+) prepares to ABSORB (\d+) damage for (.+)\.$")
+RE_TOLERANCE = re.compile(r"^🛡️ (.+) \(Atlas\) Pain Tolerance reduces damage by 1\.$")
+RE_NO_DAMAGE = re.compile(r"^🛡️ (.+) takes 0 damage\.$")
+RE_DAMAGE = re.compile(rf"^💥 (.+) takes (\d+) Exhaust Damage\. Capacity {_NUM} -> {_NUM}\.$")
+RE_EMPATH = re.compile(r"^💔 (.+) \(Peacemaker\) feels pain from partner's high damage\. \(-1 Capacity\)$")
+RE_STRESS = re.compile(r"^⚠️ STRESS ACCUMULATED: (.+)'s card rots! \+1 Token \(Total: (\d+)\)$")
+
+class Event(NamedTuple):
+    turn: int
+    kind: str
+    actor: str
+    target: str = "" # Partner name or card title
+    before: int = 0 # Capacity or weight before / amount
+    after: int = 0
+
+def parse_message(turn, msg):
+    # One log message -> Event, or None if it matches no known line.
+    # A cheap prefix / keyword test picks the single regex worth trying.
+    c = msg[:1]
+    if c == "💥":
+        m = RE_DAMAGE.match(msg)
+        return m and Event(turn, "damage", m[1], "", int(m[3]), int(m[4]))
+    if c == "🛡":
+        if "ABSORB" in msg:
+            m = RE_ABSORB.match(msg)
+            return m and Event(turn, "absorb", m[1], m[3], int(m[2]))
+        if "Pain Tolerance" in msg:
+            m = RE_TOLERANCE.match(msg)
+            return m and Event(turn, "pain_tolerance", m[1])
+        m = RE_NO_DAMAGE.match(msg)
+        return m and Event(turn, "no_damage", m[1])
+    if c == "✅":
+        m = RE_CARD_RESOLVED.match(msg)
+        return m and Event(turn, "card_resolved", m[1] or "", "", int(m[2] or 0))
+    if c == "⚠":
+        m = RE_STRESS.match(msg)
+        return m and Event(turn, "stress", m[1], "", int(m[2]))
+    if c == "💔":
+        m = RE_EMPATH.match(msg)
+        return m and Event(turn, "empath", m[1])
+    if c == "🏃":
+        m = RE_PACING.match(msg)
+        return m and Event(turn, "pacing", m[1])
+    if " resolves " in msg:
+        m = RE_RESOLVE.match(msg)
+        return m and Event(turn, "resolve_partner" if m[3] else "resolve_self", m[1], m[4], int(m[5]), int(m[6]))
+    if " COMFORTS " in msg:
+        m = RE_COMFORT.match(msg)
+        return m and Event(turn, "comfort", m[1], m[3], int(m[4]), int(m[5]))
+    if " SELF-CARES." in msg:
+        m = RE_SELF_CARE.match(msg)
+        return m and Event(turn, "self_care", m[1], "", int(m[3]), int(m[4]))
+    if " ASSISTS " in msg:
+        m = RE_ASSIST.match(msg)
+        return m and Event(turn, "assist", m[1], m[3], int(m[6]), int(m[7]))
+    if " takes Active Recovery." in msg:
+        m = RE_REST.match(msg)
+        return m and Event(turn, "rest", m[1], "", int(m[3]), int(m[4]))
+    if " activates SPRINT!" in msg:
+        m = RE_SPRINT.match(msg)
+        return m and Event(turn, "sprint", m[1])
+    if " claims " in msg:
+        m = RE_CLAIM.match(msg)
+        return m and Event(turn, "claim_shine", m[1], m[3], int(m[4]), int(m[5]))
+    return None
+
+# Player-visible archetype tags let log-only pastes recover the setup.
+_ARCH_OF = {
+    "resolve_self": RE_RESOLVE, "resolve_partner": RE_RESOLVE, "comfort": RE_COMFORT, "self_care": RE_SELF_CARE,
+    "assist": RE_ASSIST, "rest": RE_REST, "sprint": RE_SPRINT, "claim_shine": RE_CLAIM,
+}
+_INPUT_OF = {
+    "resolve_self": ACTION_CODES["resolve_self"], "resolve_partner": ACTION_CODES["resolve_partner"],
+    "comfort": ACTION_CODES["comfort"], "self_care": ACTION_CODES["self_care"], "assist": ACTION_CODES["assist"],
+    "sprint": ACTION_CODES["sprint"], "rest": INPUT_CODES["rest"], "claim_shine": INPUT_CODES["claim_shine"],
+}
+
+@dataclass
+class ParsedGame:
+    result: Optional[str] = None # "VICTORY" / "DEFEAT", None for a log-only paste
+    reason: str = ""
+    players: list = field(default_factory=list) # Header blocks: name, archetype, start, end, high, low, burnout, assists
+    cards: dict = field(default_factory=dict)
+    events: List[Event] = field(default_factory=list)
+    archetypes: dict = field(default_factory=dict) # Name -> archetype, as seen in log lines
+    malformed: int = 0
+
+    # Input reconstruction state
+    _inputs: list = field(default_factory=list)
+    _ordered_turn: int = 0
+    _ended_turn: int = 0
+    _last_turn: int = 0
+
+    def add_event(self, ev, msg):
+        if ev.turn != self._last_turn:
+            self._last_turn = ev.turn
+        self.events.append(ev)
+        if ev.kind in _ARCH_OF and ev.actor not in self.archetypes:
+            self.archetypes[ev.actor] = _ARCH_OF[ev.kind].match(msg)[2]
+
+        if ev.kind in _INPUT_OF:
+            if ev.kind != "claim_shine" and self._ordered_turn != ev.turn:
+                # The first action of a turn reveals the Strategy choice.
+                self._ordered_turn = ev.turn
+                self._inputs.append(("first", ev.actor))
+            self._inputs.append(_INPUT_OF[ev.kind])
+        elif ev.kind == "pacing" and self._ordered_turn != ev.turn:
+            self._ordered_turn = ev.turn
+            self._inputs.append(("first", ev.actor))
+        elif ev.kind == "absorb":
+            code = INPUT_CODES.get(f"absorb_{ev.before}")
+            if code: self._inputs.append(code)
+            else: self.malformed += 1
+        elif ev.kind in ("damage", "no_damage") and self._ended_turn != ev.turn:
+            # Every seat gets a damage line when a turn ends; the first one
+            # marks the end_turn input.
+            self._ended_turn = ev.turn
+            self._inputs.append(INPUT_CODES["end_turn"])
+
+    # --- Derived views ---
+
+    def names(self):
+        if self.players: return [p["name"] for p in self.players]
+        # Log-only: Exhaust reports every seat in order at the end of a turn.
+        names = []
+        turn = None
+        for ev in self.events:
+            if ev.kind in ("damage", "no_damage"):
+                if turn is not None and ev.turn != turn: return names
+                turn = ev.turn
+                names.append(ev.actor)
+        for name in self.archetypes:
+            if name not in names: names.append(name)
+        return names
+
+    def inputs(self, names):
+        # None when a log line names a player who has no seat.
+        seats = {n: i for i, n in enumerate(names)}
+        out = []
+        for x in self._inputs:
+            if isinstance(x, tuple):
+                if x[1] not in seats: return None
+                out.append(FIRST_CODES[seats[x[1]]])
+            else: out.append(x)
+        return "".join(out)
+
+    def outcome(self, names):
+        if self.result == "VICTORY": return 1
+        if self.result != "DEFEAT": return 0
+        # Longest matching name, in case one name is a prefix of another.
+        seats = [i for i, n in enumerate(names) if self.reason.startswith(f"{n} ")]
+        if not seats: return 0
+        loser = max(seats, key=lambda i: len(names[i]))
+        if "emotional capacity" in self.reason: return loss_code(loser, False)
+        if "Burnout" in self.reason: return loss_code(loser, True)
+        return 0
+
+    def player_stats(self, names):
+        if self.players:
+            return [{"capacity": p["end"], "min_cap": p["low"], "max_cap": p["high"], "burnout": p["burnout"], "assists": p["assists"]}
+                    for p in self.players]
+        # Log-only fallback: follow capacities through the events.
+        out = []
+        for name in names:
+            caps = [ev.after for ev in self.events if ev.kind in ("damage", "comfort", "self_care", "rest", "claim_shine", "assist")
+                    and (ev.target if ev.kind in ("comfort", "assist") else ev.actor) == name]
+            assists = sum(1 for ev in self.events if ev.kind == "assist" and ev.actor == name)
+            out.append({"capacity": caps[-1] if caps else 0, "min_cap": min(caps, default=0), "max_cap": max(caps, default=0),
+                        "burnout": 0, "assists": assists})
+        return out
+
+    def summary(self):
+        names = self.names()
+        damage = {n: 0 for n in names}
+        for ev in self.events:
+            if ev.kind == "damage" and ev.actor in damage: damage[ev.actor] += ev.before - ev.after
+        return {
+            "names": names, "archetypes": [self.archetypes.get(n) for n in names], "result": self.result,
+            "outcome": self.outcome(names), "turns": self._last_turn, "events": len(self.events),
+            "resolved": sum(1 for ev in self.events if ev.kind == "card_resolved"),
+            "shines": sum(1 for ev in self.events if ev.kind == "claim_shine"),
+            "absorbed": sum(ev.before for ev in self.events if ev.kind == "absorb"),
+            "damage": damage, "malformed": self.malformed,
+        }
+
+    def to_record(self):
+        # None when the players, their archetypes or the seat of every
+        # actor cannot be identified, or when a number is out of range for
+        # a game record (a damaged report).
+        names = self.names()
+        if not MIN_PLAYERS <= len(names) <= MAX_PLAYERS: return None
+        if self.players:
+            archetypes = [p["archetype"] for p in self.players]
+            rolls = [p["start"] for p in self.players]
+        else:
+            archetypes = [self.archetypes.get(n) for n in names]
+            rolls = [0] * len(names)
+        if any(a not in ARCHETYPES for a in archetypes): return None
+        inputs = self.inputs(names)
+        if inputs is None: return None
+        # end_turn advances the turn counter before the game-over check.
+        turns = self._last_turn + 1 if inputs.endswith(INPUT_CODES["end_turn"]) else self._last_turn
+        rec = {
+            "v": RECORD_VERSION,
+            "setup": {"names": names, "archetypes": archetypes, "rolls": rolls},
+            "seed": None,
+            "deck": [],
+            "actions": inputs,
+            "stats": {"outcome": self.outcome(names), "turns": turns,
+                      "resolved": sum(1 for ev in self.events if ev.kind == "card_resolved"),
+                      "players": self.player_stats(names),
+                      "cards": {t: self.cards.get(t, 0) for t in CARD_TYPES}},
+        }
+        # Every record must also fit the packed format, whose fields are fixed-width.
+        try:
+            pack_record(rec)
+        except struct.error:
+            return None
+        return rec
+
+def iter_games(lines):
+    game = None
+    player = None
+    last_turn = 0
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith("> "): line = line[2:]
+
+        if line.startswith("Turn "):
+            m = RE_LOG.match(line)
+            if not m:
+                if game: game.malformed += 1
+                continue
+            turn = int(m[1])
+            if game is None or turn < last_turn:
+                # Log-only pastes have no header; a turn counter going
+                # backwards means the next game has started.
+                if game: yield game
+                game = ParsedGame()
+            last_turn = turn
+            ev = parse_message(turn, m[2])
+            if ev: game.add_event(ev, m[2])
+            else: game.malformed += 1
+            continue
+
+        if line.startswith("GAME RESULT: "):
+            if game: yield game
+            game = ParsedGame(result=line[len("GAME RESULT: "):].strip())
+            player = None
+            last_turn = 0
+            continue
+        if game is None or not line.strip() or line.startswith("---") or line in ("PLAYER STATS", "CARDS DRAWN", "FULL GAME LOG:"):
+            continue
+        if line.startswith("REASON: "):
+            game.reason = line[len("REASON: "):]
+            continue
+        m = RE_PLAYER.match(line)
+        if m:
+            player = {"name": m[1], "archetype": m[2], "start": 0, "end": 0, "high": 0, "low": 0, "burnout": 0, "assists": 0}
+            game.players.append(player)
+            continue
+        if line.startswith("  - ") and player is not None:
+            m = RE_START.match(line)
+            if m: player["start"], player["end"] = int(m[1]), int(m[2]); continue
+            m = RE_HIGH_LOW.match(line)
+            if m: player["high"], player["low"] = int(m[1]), int(m[2]); continue
+            m = RE_BURNOUT.match(line)
+            if m: player["burnout"] = int(m[1]); continue
+            m = RE_ASSISTS.match(line)
+            if m: player["assists"] = int(m[1]); continue
+        m = RE_CARD_COUNT.match(line)
+        if m:
+            game.cards[m[1]] = int(m[2])
+            continue
+        game.malformed += 1
+    if game: yield game
+
+# --- BULK PARSING ---
+
+LOG_SUFFIXES = (".txt", ".log")
+
+def parse_file(path):
+    # Worker: all records of one file plus counters. A game that cannot be
+    # turned into a record is counted as skipped.
+    recs = []
+    games = skipped = malformed = 0
+    with open(path, encoding="utf-8", errors="replace") as fp:
+        for game in iter_games(fp):
+            games += 1
+            malformed += game.malformed
+            rec = game.to_record()
+            if rec is None: skipped += 1
+            else: recs.append(rec)
+    return recs, games, skipped, malformed
+
+def iter_log_files(root):
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(LOG_SUFFIXES): yield os.path.join(dirpath, name)
+
+def parse_tree(root, out_path, packed=False, workers=None):
+    # Parse every log under `root` with a process pool and stream the records
+    # into one archive. Returns (files, games, records, skipped, malformed).
+    totals = [0, 0, 0, 0, 0]
+    with open_archive(out_path, "wb") as out:
+        writer = PackedWriter(out) if packed else JsonlWriter(out)
+        def consume(results):
+            for recs, games, skipped, malformed in results:
+                for rec in recs: writer.write(rec)
+                totals[0] += 1; totals[1] += games; totals[2] += len(recs); totals[3] += skipped; totals[4] += malformed
+        if workers == 1:
+            consume(map(parse_file, iter_log_files(root)))
+        else:
+            with Pool(workers) as pool:
+                consume(pool.imap_unordered(parse_file, iter_log_files(root), chunksize=16))
+    return tuple(totals)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert pasted game reports into game records.")
+    parser.add_argument("root", help="A log file or a directory tree of .txt/.log files")
+    parser.add_argument("-o", "--out", required=True, help="Output archive (.gz for compression)")
+    parser.add_argument("--packed", action="store_true", help="Write the packed binary format instead of JSONL")
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes (default: one per CPU, 1 = in-process)")
+    args = parser.parse_args()
+    files, games, recs, skipped, malformed = parse_tree(args.root, args.out, args.packed, args.workers)
+    print(f"{files} files, {games} games, {recs} records written, {skipped} games skipped, {malformed} malformed lines")
@@ -0,0 +1,215 @@
+import ast
+import cProfile
+import io
+import marshal
+import pickle
+import pstats
+import threading
+import time
+import tracemalloc
+import zipfile
+from dataclasses import dataclass
+
+# Opt-in profiling of whole Streamlit reruns. Stdlib only, no Streamlit here.
+#
+# A RerunProfiler lives in a session's state while the debug toggle is on.
+# The script calls begin(phase) first thing and end() on every way out of the
+# rerun; each profiled rerun keeps its cProfile stats (CPU) and a tracemalloc
+# snapshot of the blocks it allocated that are still alive when it ends. The
+# results are grouped by the phase branch the rerun rendered and by the named
+# helpers. With the toggle off nothing here runs.
+#
+# cProfile only sees the script thread (not the speculation pool), while
+# tracemalloc is process wide, so busy servers mix other sessions' allocations
+# into the snapshots.
+
+HELPERS = ("render_p", "calculate_vals", "save_checkpoint", "create_deck")
+TRACE_FRAMES = 25 # Frames kept per allocation, enough to reach the helper that caused it
+
+_IGNORED = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib.*>"),
+            tracemalloc.Filter(False, "<unknown>")]
+
+# tracemalloc is process global; several sessions may profile at once.
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_owned = False
+
+def _start_tracing():
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            _trace_owned = True
+        _trace_users += 1
+        tracemalloc.reset_peak()
+
+def _stop_tracing():
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        peak = tracemalloc.get_traced_memory()[1]
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_owned:
+            tracemalloc.stop()
+            _trace_owned = False
+    return snapshot, peak
+
+@dataclass
+class RerunProfile:
+    phase: str
+    seconds: float
+    stats: dict # cProfile stats in pstats form
+    snapshot: tracemalloc.Snapshot
+    peak: int # Peak traced bytes during the rerun
+
+class _RawStats:
+    # Lets pstats.Stats load a stats dict we already hold.
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+class RerunProfiler:
+    def __init__(self, reruns, helpers=HELPERS):
+        self.remaining = reruns
+        self.helpers = helpers
+        self.runs = []
+        self._prof = None
+        self._phase = ""
+        self._t0 = 0.0
+
+    @property
+    def active(self):
+        return self._prof is not None
+
+    def begin(self, phase):
+        if self._prof: self.end() # The previous rerun died without reaching end()
+        if self.remaining <= 0: return
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # Another profiler holds the hook (one per process from Python
+            # 3.12, e.g. another session's rerun); this rerun goes unprofiled.
+            return
+        _start_tracing()
+        self._phase = phase
+        self._prof = prof
+        self._t0 = time.perf_counter()
+
+    def end(self):
+        if not self._prof: return
+        self._prof.disable()
+        seconds = time.perf_counter() - self._t0
+        snapshot, peak = _stop_tracing()
+        self._prof.create_stats()
+        self.runs.append(RerunProfile(self._phase, seconds, self._prof.stats, snapshot, peak))
+        self._prof = None
+        self.remaining -= 1
+
+    # --- REPORTS ---
+
+    def phases(self):
+        out = {}
+        for run in self.runs: out.setdefault(run.phase, []).append(run)
+        return out
+
+    def merged_stats(self, runs=None):
+        runs = self.runs if runs is None else runs
+        # Copies, since pstats merges into the first dict it is given.
+        return pstats.Stats(*(_RawStats(dict(r.stats)) for r in runs)) if runs else None
+
+    def top_functions(self, runs=None, n=15, key="cumulative"):
+        stats = self.merged_stats(runs)
+        if stats is None: return []
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({"function": func, "where": f"{_short(filename)}:{line}", "calls": nc,
+                         "own_ms": tt * 1e3, "cumulative_ms": ct * 1e3})
+        rows.sort(key=lambda r: r["cumulative_ms" if key == "cumulative" else "own_ms"], reverse=True)
+        return rows[:n]
+
+    def top_allocations(self, runs=None, n=15):
+        # Allocation sites summed over the runs, by the line that allocated.
+        runs = self.runs if runs is None else runs
+        sites = {}
+        for run in runs:
+            for s in run.snapshot.statistics("lineno"):
+                frame = s.traceback[0]
+                site = sites.setdefault((frame.filename, frame.lineno), [0, 0])
+                site[0] += s.size; site[1] += s.count
+        rows = [{"where": f"{_short(f)}:{line}", "kib": size / 1024, "blocks": count}
+                for (f, line), (size, count) in sites.items()]
+        rows.sort(key=lambda r: r["kib"], reverse=True)
+        return rows[:n]
+
+    def helper_summary(self, runs=None):
+        # Calls, CPU and retained allocations per named helper.
+        runs = self.runs if runs is None else runs
+        stats = self.merged_stats(runs)
+        if stats is None: return []
+        spans = {}
+        rows = {h: {"helper": h, "calls": 0, "cumulative_ms": 0.0, "kib": 0.0} for h in self.helpers}
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            if func not in rows: continue
+            rows[func]["calls"] += nc
+            rows[func]["cumulative_ms"] += ct * 1e3
+            span = _function_span(filename, line)
+            if span: spans.setdefault(filename, []).append((span[0], span[1], func))
+        if spans:
+            for run in runs:
+                for trace in run.snapshot.traces:
+                    func = _owning_helper(trace.traceback, spans)
+                    if func: rows[func]["kib"] += trace.size / 1024
+        return list(rows.values())
+
+    # --- RAW EXPORT ---
+
+    def pstats_bytes(self, runs=None):
+        # Merged profile in the format cProfile.dump_stats writes (snakeviz,
+        # gprof2dot -f pstats, flameprof, ...).
+        stats = self.merged_stats(runs)
+        return marshal.dumps(stats.stats) if stats else b""
+
+    def archive_bytes(self):
+        # Every rerun as its own .prof plus a tracemalloc snapshot that
+        # tracemalloc.Snapshot.load() reads back.
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i, run in enumerate(self.runs, 1):
+                name = f"rerun_{i:02d}_{run.phase.lower().replace(' ', '_')}"
+                zf.writestr(f"{name}.prof", marshal.dumps(run.stats))
+                zf.writestr(f"{name}.tracemalloc", pickle.dumps(run.snapshot, pickle.HIGHEST_PROTOCOL))
+            zf.writestr("all_reruns.prof", self.pstats_bytes())
+        return buf.getvalue()
+
+def _short(filename):
+    return filename.replace("\\", "/").rsplit("/", 1)[-1]
+
+_span_cache = {}
+
+def _function_span(filename, line):
+    # (first, last) source line of the function defined at `line`, nested
+    # functions such as app.py's render_p included.
+    key = (filename, line)
+    if key not in _span_cache:
+        _span_cache[key] = None
+        try:
+            with open(filename, encoding="utf-8") as fp: tree = ast.parse(fp.read())
+        except (OSError, SyntaxError, ValueError):
+            return None
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                if first == line or node.lineno == line:
+                    _span_cache[key] = (line, node.end_lineno)
+                    break
+    return _span_cache[key]
+
+def _owning_helper(traceback, spans):
+    # Innermost helper on the allocation's stack, if any.
+    for frame in reversed(traceback):
+        for first, last, func in spans.get(frame.filename, ()):
+            if first <= frame.lineno <= last: return func
+    return None
@@ -0,0 +1,241 @@
+import gzip
+import json
+import struct
+from engine import ARCHETYPES, DEFAULT_STACKING, card_from_id, new_table, apply_input, legal_inputs, outcome_code
+
+# Compact machine-readable game records.
+#
+# A record is a plain dict:
+#   {"v": 1, "setup": {"names": [..], "archetypes": [..], "rolls": [..]},
+#    "seed": int | None, "deck": [card IDs], "actions": "fmhe...",
+#    "stats": {...}}
+#
+# The setup lists and stats["players"] hold one entry per seat (2-6).
+# Adaptive games add setup["stacking"] = [hurricanes, depth, shines]; it is
+# left out for the standard deck.
+# "deck" is the create_deck order before the setup Drizzles are pulled, and
+# "actions" is one engine.INPUT_CODES char per committed input, so replay()
+# can rebuild any position of the game exactly.
+#
+# Two interchangeable containers are supported, both appendable and
+# readable one record at a time so archives never have to fit in memory:
+#   * JSONL  - one record per line.
+#   * packed - b"RSGR" + version byte, then length-prefixed binary records.
+# Paths ending in ".gz" are transparently gzip-compressed.
+
+RECORD_VERSION = 1
+PACKED_MAGIC = b"RSGR"
+CARD_TYPES = ["Drizzle", "Downpour", "Hurricane", "Shine"]
+
+def game_record(g):
+    players = []
+    for p in g.players:
+        players.append({"capacity": p.capacity, "min_cap": p.min_cap, "max_cap": p.max_cap,
+                        "burnout": p.total_burnout_gained, "assists": p.assists_used})
+    setup = {"names": [p.name for p in g.players], "archetypes": [p.archetype for p in g.players], "rolls": list(g.rolls)}
+    if g.stacking != DEFAULT_STACKING: setup["stacking"] = list(g.stacking)
+    return {
+        "v": RECORD_VERSION,
+        "setup": setup,
+        "seed": g.seed,
+        "deck": list(g.start_deck),
+        "actions": "".join(g.actions),
+        "stats": {"outcome": outcome_code(g), "turns": g.turn, "resolved": g.resolved,
+                  "players": players, "cards": dict(g.card_stats)},
+    }
+
+def replay(rec, upto=None):
+    # Rebuild the game from its setup and inputs; `upto` stops after that many inputs.
+    # Raises ValueError for a record that cannot be replayed, including one
+    # with an input its position does not accept.
+    setup = rec["setup"]
+    table = setup["names"], setup["archetypes"], setup["rolls"]
+    if rec.get("seed") is not None:
+        g = new_table(*table, seed=rec["seed"], stacking=setup.get("stacking"))
+        if rec.get("deck") and g.start_deck != list(rec["deck"]):
+            raise ValueError("Record deck does not match its seed.")
+    elif not rec.get("deck"):
+        raise ValueError("Record has neither a seed nor a deck (e.g. parsed from a text log) and cannot be replayed.")
+    else:
+        g = new_table(*table, deck=[card_from_id(i) for i in rec["deck"]], stacking=setup.get("stacking"))
+    for i, ch in enumerate(rec["actions"][:upto]):
+        if ch not in legal_inputs(g): raise ValueError(f"Record input #{i + 1} ({ch!r}) is not legal at its position.")
+        apply_input(g, ch)
+    return g
+
+# --- JSONL ---
+
+def open_archive(path, mode="rb"):
+    if str(path).endswith(".gz"): return gzip.open(path, mode)
+    return open(path, mode)
+
+class JsonlWriter:
+    def __init__(self, fp):
+        self.fp = fp
+
+    def write(self, rec):
+        self.fp.write(json.dumps(rec, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n")
+
+def iter_jsonl(fp):
+    for line in fp:
+        line = line.strip()
+        if line: yield json.loads(line)
+
+# --- PACKED BINARY ---
+# Per record (little-endian), after a u32 byte length:
+#   u8 version | u8 flags (bit0: seed present, bit1: more than two seats,
+#   bit2: stacking) | u64 seed
+#   u8 archetypes (a1 << 4 | a2) | u8 roll1 | u8 roll2 | u8 len + utf-8 name, twice
+#   if bit1: u8 extra seats, then per seat u8 archetype, u8 roll, u8 len + utf-8 name
+#   if bit2: u8 hurricanes, u8 depth, u8 shines
+#   u8 deck len + u8 card IDs
+#   u16 input count + ascii inputs | u8 outcome | u16 turns | u8 resolved
+#   per seat: i16 capacity, i16 min_cap, i16 max_cap, u8 burnout, u8 assists
+#   u16 drawn count per CARD_TYPES entry
+
+_HEAD = struct.Struct("<BBQBBB")
+_STATS = struct.Struct("<BHB")
+_PLAYER = struct.Struct("<hhhBB")
+_CARDS = struct.Struct("<4H")
+_LEN = struct.Struct("<I")
+
+def _pack_name(name):
+    raw = name.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+    return bytes([len(raw)]) + raw
+
+def _unpack_name(buf, pos):
+    n = buf[pos]
+    return bytes(buf[pos + 1:pos + 1 + n]).decode("utf-8"), pos + 1 + n
+
+def pack_record(rec):
+    setup = rec["setup"]
+    seed = rec.get("seed")
+    names, rolls = setup["names"], setup["rolls"]
+    archs = [ARCHETYPES.index(a) for a in setup["archetypes"]]
+    stacking = setup.get("stacking")
+    flags = (1 if seed is not None else 0) | (2 if len(names) > 2 else 0) | (4 if stacking else 0)
+    parts = [_HEAD.pack(RECORD_VERSION, flags, seed or 0, archs[0] << 4 | archs[1], rolls[0], rolls[1])]
+    parts.append(_pack_name(names[0]) + _pack_name(names[1]))
+    if len(names) > 2:
+        parts.append(bytes([len(names) - 2]))
+        for i in range(2, len(names)):
+            parts.append(bytes([archs[i], rolls[i]]) + _pack_name(names[i]))
+    if stacking: parts.append(bytes(stacking))
+    parts.append(bytes([len(rec["deck"])]) + bytes(rec["deck"]))
+    actions = rec["actions"].encode("ascii")
+    parts.append(struct.pack("<H", len(actions)) + actions)
+    stats = rec["stats"]
+    parts.append(_STATS.pack(stats["outcome"], stats["turns"], stats["resolved"]))
+    for p in stats["players"]:
+        parts.append(_PLAYER.pack(p["capacity"], p["min_cap"], p["max_cap"], p["burnout"], p["assists"]))
+    parts.append(_CARDS.pack(*(stats["cards"][t] for t in CARD_TYPES)))
+    return b"".join(parts)
+
+def unpack_record(buf):
+    # Raises ValueError for a truncated or damaged record.
+    try:
+        rec, end = _unpack_record(buf)
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise ValueError("Packed record is truncated or damaged.")
+    if end != len(buf): raise ValueError("Packed record is truncated or damaged.")
+    return rec
+
+def _unpack_record(buf):
+    # (record, bytes read). Slices past the end come back short rather than
+    # raising, so the caller compares the bytes read with the record length.
+    version, flags, seed, arch, r1, r2 = _HEAD.unpack_from(buf, 0)
+    if version != RECORD_VERSION:
+        raise ValueError(f"Unsupported record version {version}.")
+    pos = _HEAD.size
+    archetypes, rolls, names = [ARCHETYPES[arch >> 4], ARCHETYPES[arch & 15]], [r1, r2], []
+    for _ in range(2):
+        name, pos = _unpack_name(buf, pos)
+        names.append(name)
+    if flags & 2:
+        extra = buf[pos]
+        pos += 1
+        for _ in range(extra):
+            archetypes.append(ARCHETYPES[buf[pos]]); rolls.append(buf[pos + 1])
+            name, pos = _unpack_name(buf, pos + 2)
+            names.append(name)
+    setup = {"names": names, "archetypes": archetypes, "rolls": rolls}
+    if flags & 4:
+        setup["stacking"] = list(buf[pos:pos + 3])
+        pos += 3
+    n = buf[pos]
+    deck = list(buf[pos + 1:pos + 1 + n])
+    pos += 1 + n
+    (n,) = struct.unpack_from("<H", buf, pos)
+    actions = bytes(buf[pos + 2:pos + 2 + n]).decode("ascii")
+    pos += 2 + n
+    outcome, turns, resolved = _STATS.unpack_from(buf, pos)
+    pos += _STATS.size
+    players = []
+    for _ in names:
+        cap, lo, hi, burnout, assists = _PLAYER.unpack_from(buf, pos)
+        players.append({"capacity": cap, "min_cap": lo, "max_cap": hi, "burnout": burnout, "assists": assists})
+        pos += _PLAYER.size
+    cards = dict(zip(CARD_TYPES, _CARDS.unpack_from(buf, pos)))
+    pos += _CARDS.size
+    return {
+        "v": version,
+        "setup": setup,
+        "seed": seed if flags & 1 else None,
+        "deck": deck,
+        "actions": actions,
+        "stats": {"outcome": outcome, "turns": turns, "resolved": resolved, "players": players, "cards": cards},
+    }, pos
+
+class PackedWriter:
+    def __init__(self, fp):
+        self.fp = fp
+        # Appending to an existing archive must not repeat the header.
+        if fp.tell() == 0: fp.write(PACKED_MAGIC + bytes([RECORD_VERSION]))
+
+    def write(self, rec):
+        body = pack_record(rec)
+        self.fp.write(_LEN.pack(len(body)) + body)
+
+def iter_packed(fp):
+    head = fp.read(len(PACKED_MAGIC) + 1)
+    if head[:len(PACKED_MAGIC)] != PACKED_MAGIC:
+        raise ValueError("Not a packed game archive.")
+    while True:
+        raw = fp.read(_LEN.size)
+        if not raw: return
+        if len(raw) < _LEN.size: raise ValueError("Packed archive is truncated.")
+        if raw == PACKED_MAGIC:
+            # Header of an appended gzip member; skip its version byte.
+            fp.read(1)
+            continue
+        (n,) = _LEN.unpack(raw)
+        yield unpack_record(fp.read(n))
+
+# --- CONVENIENCE ---
+
+def iter_records(fp):
+    # Sniffs the container format from the first bytes.
+    if hasattr(fp, "peek"):
+        head = fp.peek(len(PACKED_MAGIC))[:len(PACKED_MAGIC)]
+    else:
+        head = fp.read(len(PACKED_MAGIC))
+        fp.seek(-len(head), 1)
+    if head == PACKED_MAGIC: return iter_packed(fp)
+    return iter_jsonl(fp)
+
+def read_archive(path):
+    with open_archive(path, "rb") as fp:
+        yield from iter_records(fp)
+
+def dumps_jsonl(records):
+    out = []
+    for rec in records:
+        out.append(json.dumps(rec, separators=(",", ":"), ensure_ascii=False))
+    return "\n".join(out) + "\n"
+
+def dumps_packed(records):
+    out = [PACKED_MAGIC + bytes([RECORD_VERSION])]
+    for rec in records:
+        body = pack_record(rec)
+        out.append(_LEN.pack(len(body)) + body)
+    return b"".join(out)
@@ -0,0 +1,196 @@
+import argparse
+import math
+import random
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Callable, Optional
+from engine import (
+    ARCHETYPES, ACTION_CODES, FIRST_CODES, new_table, game_result, legal_inputs, apply_input, acting_seat,
+    atlas_opportunity, calculate_vals, outcome_code, MIN_PLAYERS, MAX_PLAYERS,
+)
+
+# Headless self-play. A policy is any callable `policy(g, inputs, rng)` that
+# returns one of the legal input codes for the current position.
+
+# --- 1. POLICIES ---
+
+def random_policy(g, inputs, rng):
+    return rng.choice(inputs)
+
+def greedy_policy(g, inputs, rng):
+    if len(inputs) == 1: return inputs[0]
+
+    if g.phase == "Strategy":
+        # The healthiest player goes first so their stronger action lands early.
+        best = max(range(len(g.players)), key=lambda i: (g.players[i].capacity, -i))
+        return FIRST_CODES[best]
+
+    if g.phase == "Atlas_Intervention":
+        atlas_player = atlas_opportunity(g)[0]
+        return inputs[-1] if atlas_player.capacity >= 8 else inputs[0]
+
+    actor_id = g.actor_queue[0]
+    actor = g.player(actor_id)
+    partner = g.partner_of(actor_id)
+    vals = calculate_vals(actor, partner)
+    resolve_self, resolve_partner = ACTION_CODES["resolve_self"], ACTION_CODES["resolve_partner"]
+    comfort, self_care, assist = ACTION_CODES["comfort"], ACTION_CODES["self_care"], ACTION_CODES["assist"]
+
+    # Finish a card whenever one action is enough.
+    if resolve_self in inputs and actor.active_card.weight <= vals["Resolve"]: return resolve_self
+    if resolve_partner in inputs and partner.active_card.weight <= vals["Resolve"]: return resolve_partner
+    # Otherwise keep both players out of Burnout.
+    if actor.capacity <= 4: return self_care
+    if partner.capacity <= 4 and comfort in inputs: return comfort
+    if partner.capacity <= 6 and assist in inputs and partner.archetype in ("Soloist", "Atlas"): return assist
+    if resolve_self in inputs: return resolve_self
+    if resolve_partner in inputs: return resolve_partner
+    return self_care
+
+POLICIES = {"random": random_policy, "greedy": greedy_policy}
+
+# --- 2. SELF-PLAY ---
+
+def roll_capacity(rng):
+    return max(1, rng.randint(1,6) + rng.randint(1,6))
+
+def play_game(policy, seed, archetypes=None, variant=None, max_turns=200, players=2, rolls=None, stacking=None,
+              trace=None):
+    # Everything random about a game (archetypes, rolls, deck, policy dice) is
+    # derived from `seed`, so two policies given the same seed face the same
+    # setup and the same deck order. `variant(g)` may alter the fresh game to
+    # test a rule change. `archetypes`, when given, fixes the table size;
+    # `rolls` and `stacking` fix the starting capacities and the deck stacking.
+    # `trace(g, ch, actor, turn)`, when given, sees every input after it is
+    # applied, with the seat that chose it and the turn it was made in.
+    setup_rng = random.Random(seed)
+    if archetypes: archetypes = list(archetypes)
+    else: archetypes = [setup_rng.choice(ARCHETYPES) for _ in range(players)]
+    if rolls: rolls = list(rolls)
+    else: rolls = [roll_capacity(setup_rng) for _ in archetypes]
+    names = [f"Player {i + 1}" for i in range(len(archetypes))]
+    g = new_table(names, archetypes, rolls, seed=setup_rng.randrange(2**63), stacking=stacking)
+    if variant: variant(g)
+    policy_rng = random.Random(setup_rng.randrange(2**63))
+    while not game_result(g)[0] and g.turn <= max_turns:
+        ch = policy(g, legal_inputs(g), policy_rng)
+        if trace:
+            actor, turn = acting_seat(g), g.turn
+            apply_input(g, ch)
+            trace(g, ch, actor, turn)
+        else:
+            apply_input(g, ch)
+    return g
+
+def won(g):
+    return 1.0 if outcome_code(g) == 1 else 0.0
+
+def cards_resolved(g):
+    return float(g.resolved)
+
+def turns_survived(g):
+    return float(g.turn)
+
+METRICS = {"won": won, "resolved": cards_resolved, "turns": turns_survived}
+
+# --- 3. PAIRED COMPARISON (COMMON RANDOM NUMBERS) ---
+
+@dataclass
+class Arm:
+    name: str
+    policy: Callable
+    variant: Optional[Callable] = None
+
+@dataclass
+class PairedResult:
+    games: int
+    mean_a: float
+    mean_b: float
+    diff: float # mean of (a - b) over paired games
+    low: float
+    high: float
+    half_width: float
+    a_only: int # games where arm A scored higher (won while B lost, for the default metric)
+    b_only: int
+    variance_ratio: float # unpaired / paired variance of the difference; >1 means pairing helped
+    converged: bool
+
+class _Running:
+    # Welford running mean and variance.
+    def __init__(self):
+        self.n = 0; self.mean = 0.0; self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+PSEUDO_PAIRS = 2 # Per direction, added to the variance only (plus-four smoothing)
+
+def _half_width(d, z):
+    # Interval half-width from the paired differences plus PSEUDO_PAIRS
+    # imaginary games won by each arm by one unit of the metric. Without them a run of ties
+    # (common for a rare-event metric like `won`) has zero variance and a
+    # zero-width interval; with them it is about as wide as the rule of three
+    # allows for that many games without a discordant pair.
+    if d.n < 2: return math.inf
+    n = d.n + 2 * PSEUDO_PAIRS
+    total = d.n * d.mean # The pseudo-pairs cancel out in the sum
+    squares = d.m2 + d.n * d.mean ** 2 + 2 * PSEUDO_PAIRS
+    return z * math.sqrt((squares - total ** 2 / n) / (n - 1) / n)
+
+def compare(arm_a, arm_b, target_half_width=0.02, confidence=0.95, min_games=200, max_games=100000,
+            check_every=100, archetypes=None, metric=won, first_seed=0, players=2):
+    # Plays both arms on the same per-game seeds and stops once the confidence
+    # interval of the paired difference is narrower than target_half_width.
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    a, b, d = _Running(), _Running(), _Running()
+    a_only = b_only = 0
+    seed = first_seed
+    while d.n < max_games:
+        xa = metric(play_game(arm_a.policy, seed, archetypes, arm_a.variant, players=players))
+        xb = metric(play_game(arm_b.policy, seed, archetypes, arm_b.variant, players=players))
+        seed += 1
+        a.add(xa); b.add(xb); d.add(xa - xb)
+        if xa > xb: a_only += 1
+        elif xb > xa: b_only += 1
+        if d.n >= min_games and d.n % check_every == 0:
+            if _half_width(d, z) <= target_half_width: break
+    half = _half_width(d, z)
+    paired_var = d.var()
+    ratio = (a.var() + b.var()) / paired_var if paired_var > 0 else math.inf
+    return PairedResult(d.n, a.mean, b.mean, d.mean, d.mean - half, d.mean + half, half,
+                        a_only, b_only, ratio, half <= target_half_width)
+
+def format_result(arm_a, arm_b, r):
+    lines = [
+        f"{arm_a.name} vs {arm_b.name} over {r.games} paired games",
+        f"  Mean: {arm_a.name} {r.mean_a:.3f} | {arm_b.name} {r.mean_b:.3f}",
+        f"  Difference: {r.diff:+.4f}  (CI {r.low:+.4f} .. {r.high:+.4f}, half-width {r.half_width:.4f})",
+        f"  Discordant games: {arm_a.name} only {r.a_only} | {arm_b.name} only {r.b_only}",
+    ]
+    if math.isfinite(r.variance_ratio):
+        lines.append(f"  Variance reduction from pairing: x{r.variance_ratio:.2f} (~{r.variance_ratio:.1f}x fewer games than independent runs)")
+    if not r.converged: lines.append("  Stopped at max_games before reaching the target half-width.")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paired policy comparison on shared deck orders and setup rolls.")
+    parser.add_argument("policy_a", choices=sorted(POLICIES))
+    parser.add_argument("policy_b", choices=sorted(POLICIES))
+    parser.add_argument("--archetypes", nargs="+", choices=ARCHETYPES, help="One per seat; overrides --players")
+    parser.add_argument("--players", type=int, default=2, choices=range(MIN_PLAYERS, MAX_PLAYERS + 1))
+    parser.add_argument("--metric", choices=sorted(METRICS), default="won")
+    parser.add_argument("--half-width", type=float, default=0.02)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--max-games", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    arm_a, arm_b = Arm(args.policy_a, POLICIES[args.policy_a]), Arm(args.policy_b, POLICIES[args.policy_b])
+    res = compare(arm_a, arm_b, args.half_width, args.confidence, max_games=args.max_games,
+                  archetypes=args.archetypes, metric=METRICS[args.metric], first_seed=args.seed, players=args.players)
+    print(format_result(arm_a, arm_b, res))
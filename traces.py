@@ -0,0 +1,232 @@
+import argparse
+import os
+from array import array
+from multiprocessing import Pool
+import numpy as np
+from engine import MAX_PLAYERS, SEED_LIMIT, CARD_IDS, ARCHETYPES, INPUT_CODES
+from sim import POLICIES, play_game
+
+# Turn-level trace store for balance analysis at scale.
+#
+# Every committed input of a simulated game becomes one fixed-width row of
+# TRACE_DTYPE. Rows are buffered in typed arrays, turned into a NumPy
+# structured array a chunk at a time and appended to a shard file. Readers
+# memory-map the shards and scan them chunk by chunk, so a query over
+# billions of rows needs memory for one chunk, not for the store.
+#
+# A store is a directory of shards (one per writer process):
+#   shard-0000.trace = 16-byte header (b"RSTR", u8 version, u8 seats,
+#                      u16 row size, zero padding) + rows, native byte order
+# A row left half-written by a killed writer is ignored by readers and cut
+# off by the next writer to append to that shard.
+
+TRACE_VERSION = 2 # 2: u8 game ids and i2 damage, matching the seed and TurnSeries ranges
+TRACE_MAGIC = b"RSTR"
+HEADER_SIZE = 16
+NO_CARD = 255
+TRACE_DTYPE = np.dtype([
+    ("game", "u8"),     # Game id (the self-play seed)
+    ("turn", "u2"),     # Turn the input was made in
+    ("seq", "u2"),      # Input index within the game
+    ("actor", "i1"),    # Seat that chose the input, -1 for table-wide inputs
+    ("action", "u1"),   # engine.INPUT_CODES char, as its byte value
+    ("players", "u1"),
+    ("resolved", "u1"), # Cards resolved after the input
+    ("capacity", "i2", (MAX_PLAYERS,)), # After the input; unused seats are 0
+    ("card", "u1", (MAX_PLAYERS,)),     # Active card ID after the input, NO_CARD for none
+    ("damage", "i2", (MAX_PLAYERS,)),   # Exhaust damage taken; only end_turn rows are non-zero
+])
+CHUNK_ROWS = 1 << 16
+ACTION_NAMES = {ord(ch): name for name, ch in INPUT_CODES.items()}
+_PAD = [[0] * (MAX_PLAYERS - n) for n in range(MAX_PLAYERS + 1)] # Seats n.. of a row
+_NO_CARDS = [[NO_CARD] * (MAX_PLAYERS - n) for n in range(MAX_PLAYERS + 1)]
+
+# --- 1. WRITING ---
+
+class TraceWriter:
+    def __init__(self, path, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rows = 0 # Written so far by this writer, buffered rows included
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size:
+            _check_header(path)
+            # Drop a row left half-written by a killed writer so appends stay aligned.
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // TRACE_DTYPE.itemsize * TRACE_DTYPE.itemsize
+            if whole != size: os.truncate(path, whole)
+        self.fp = open(path, "ab")
+        if not size: self.fp.write(_header())
+        self._reset()
+
+    def _reset(self):
+        self._game, self._turn, self._seq = array("Q"), array("H"), array("H")
+        self._actor, self._action, self._players, self._resolved = array("b"), array("B"), array("B"), array("B")
+        self._capacity, self._card, self._damage = array("h"), array("B"), array("h")
+
+    def tracer(self, game_id):
+        # A sim.play_game trace callback writing this game's inputs.
+        seq = [0]
+        def trace(g, ch, actor, turn):
+            self.add(game_id, seq[0], g, ch, actor, turn)
+            seq[0] += 1
+        return trace
+
+    def add(self, game_id, seq, g, ch, actor, turn):
+        n = len(g.players)
+        self._game.append(game_id); self._turn.append(turn); self._seq.append(seq)
+        self._actor.append(actor); self._action.append(ord(ch)); self._players.append(n); self._resolved.append(g.resolved)
+        for p in g.players:
+            c = p.active_card
+            self._capacity.append(p.capacity)
+            self._card.append(CARD_IDS[c.title] if c else NO_CARD)
+        if n < MAX_PLAYERS:
+            self._capacity.extend(_PAD[n]); self._card.extend(_NO_CARDS[n])
+        if ch == INPUT_CODES["end_turn"]:
+            self._damage.extend(g.series.damage[-n:]); self._damage.extend(_PAD[n])
+        else:
+            self._damage.extend(_PAD[0])
+        self.rows += 1
+        if len(self._game) >= self.chunk_rows: self.flush()
+
+    def flush(self):
+        rows = len(self._game)
+        if not rows: return
+        chunk = np.empty(rows, TRACE_DTYPE)
+        for name in TRACE_DTYPE.names:
+            buf = getattr(self, "_" + name)
+            values = np.frombuffer(buf, dtype=buf.typecode)
+            chunk[name] = values.reshape(rows, MAX_PLAYERS) if TRACE_DTYPE[name].shape else values
+        self.fp.write(chunk.tobytes())
+        self.fp.flush()
+        self._reset()
+
+    def close(self):
+        self.flush()
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _header():
+    return (TRACE_MAGIC + bytes([TRACE_VERSION, MAX_PLAYERS]) + TRACE_DTYPE.itemsize.to_bytes(2, "little")).ljust(HEADER_SIZE, b"\0")
+
+def _check_header(path):
+    with open(path, "rb") as fp: head = fp.read(HEADER_SIZE)
+    if head[:4] != TRACE_MAGIC: raise ValueError(f"{path} is not a trace shard.")
+    if head != _header(): raise ValueError(f"{path} was written with a different trace layout (version {head[4]}).")
+
+# --- 2. READING & QUERIES ---
+
+class TraceStore:
+    def __init__(self, root):
+        self.root = root
+        if os.path.isdir(root):
+            self.paths = sorted(os.path.join(root, f) for f in os.listdir(root) if f.endswith(".trace"))
+        else:
+            self.paths = [root]
+        self.shards = []
+        for path in self.paths:
+            _check_header(path)
+            rows = (os.path.getsize(path) - HEADER_SIZE) // TRACE_DTYPE.itemsize
+            if rows: self.shards.append(np.memmap(path, TRACE_DTYPE, "r", offset=HEADER_SIZE, shape=(rows,)))
+
+    def __len__(self):
+        return sum(len(s) for s in self.shards)
+
+    def chunks(self, chunk_rows=1 << 22):
+        # Memory-mapped slices; only the pages a query touches are read.
+        for shard in self.shards:
+            for start in range(0, len(shard), chunk_rows):
+                yield shard[start:start + chunk_rows]
+
+    def scan(self, where=None, chunk_rows=1 << 22):
+        # Chunks filtered by `where(chunk) -> bool mask`, e.g.
+        #   store.scan(lambda t: (t["action"] == ord("m")) & (t["turn"] > 3))
+        for chunk in self.chunks(chunk_rows):
+            yield chunk if where is None else chunk[where(chunk)]
+
+    def count(self, where=None):
+        return sum(len(c) for c in self.scan(where))
+
+    def group_by(self, key, value=None, where=None):
+        # {key: (rows, sum of value, mean of value)}. `key` and `value` are a
+        # field name or a function of the chunk returning one number per row
+        # (e.g. lambda t: t["capacity"][:, 0]). Combined chunk by chunk with
+        # np.unique + np.bincount, so memory is bounded by the key count.
+        counts, sums = {}, {}
+        for chunk in self.scan(where):
+            if not len(chunk): continue
+            keys = _column(chunk, key)
+            uniq, inverse = np.unique(keys, return_inverse=True)
+            n = np.bincount(inverse, minlength=len(uniq))
+            s = np.bincount(inverse, weights=_column(chunk, value), minlength=len(uniq)) if value is not None else n
+            for k, cn, cs in zip(uniq.tolist(), n.tolist(), s.tolist()):
+                counts[k] = counts.get(k, 0) + cn
+                sums[k] = sums.get(k, 0) + cs
+        return {k: (counts[k], sums[k], sums[k] / counts[k]) for k in sorted(counts)}
+
+def _column(chunk, f):
+    return chunk[f] if isinstance(f, str) else f(chunk)
+
+# --- 3. BATCH SELF-PLAY ---
+
+def _record_shard(job):
+    root, shard, first, games, policy_name, players, archetypes = job
+    policy = POLICIES[policy_name]
+    with TraceWriter(os.path.join(root, f"shard-{shard:04d}.trace")) as writer:
+        for seed in range(first, first + games):
+            play_game(policy, seed, archetypes, players=players, trace=writer.tracer(seed))
+        return writer.rows
+
+def record(root, games, policy="greedy", players=2, archetypes=None, first_seed=0, workers=None):
+    # Self-play `games` games into the store at `root`, one shard per worker.
+    # The game id is the seed, so a row can be traced back with sim.play_game.
+    if first_seed < 0 or first_seed + games > SEED_LIMIT: raise ValueError(f"Seeds must stay between 0 and {SEED_LIMIT - 1}.")
+    os.makedirs(root, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    start = len([f for f in os.listdir(root) if f.endswith(".trace")])
+    per = -(-games // workers)
+    jobs = []
+    for k in range(workers):
+        first = first_seed + k * per
+        n = min(per, first_seed + games - first)
+        if n > 0: jobs.append((root, start + k, first, n, policy, players, archetypes))
+    if len(jobs) == 1: return _record_shard(jobs[0])
+    with Pool(len(jobs)) as pool:
+        return sum(pool.imap_unordered(_record_shard, jobs))
+
+def summary(store):
+    lines = [f"{len(store)} rows in {len(store.shards)} shards"]
+    lines.append("Inputs by action:")
+    for code, (rows, _, _) in store.group_by("action").items():
+        lines.append(f"  {ACTION_NAMES.get(code, chr(code)):<16} {rows}")
+    lines.append("Mean Exhaust damage to seat 1 by turn:")
+    end_turn = ord(INPUT_CODES["end_turn"])
+    by_turn = store.group_by("turn", lambda t: t["damage"][:, 0], where=lambda t: t["action"] == end_turn)
+    for turn, (rows, _, mean) in by_turn.items():
+        lines.append(f"  turn {turn:<4} {mean:6.2f}  ({rows} turns)")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Turn-level trace store for simulated games.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("record", help="Self-play games into a trace store")
+    p.add_argument("root", help="Store directory (shards are added next to existing ones)")
+    p.add_argument("--games", type=int, default=10000)
+    p.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    p.add_argument("--players", type=int, default=2)
+    p.add_argument("--archetypes", nargs="+", choices=ARCHETYPES)
+    p.add_argument("--seed", type=int, default=0, help="First game seed (and game id)")
+    p.add_argument("-j", "--workers", type=int, help="Worker processes (default: one per CPU)")
+    p = sub.add_parser("summary", help="Row counts and a few vectorized aggregates")
+    p.add_argument("root")
+    args = parser.parse_args()
+    if args.command == "record":
+        if not 0 <= args.seed <= SEED_LIMIT - args.games: parser.error(f"seeds must stay between 0 and {SEED_LIMIT - 1}")
+        rows = record(args.root, args.games, args.policy, args.players, args.archetypes, args.seed, args.workers)
+        print(f"{rows} rows written to {args.root}")
+    else:
+        print(summary(TraceStore(args.root)))
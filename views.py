@@ -0,0 +1,119 @@
+import copy
+from engine import game_result
+
+# HTML fragments and text reports for the dashboard, kept free of Streamlit
+# so they can be built (and benchmarked) outside the UI script.
+
+def player_card_html(player, is_acting):
+    border = "2px solid #FF4B4B" if is_acting else "1px solid #333"
+    
+    assists_left = 8 - player.assists_used
+    
+    return f"""
+    <div style="border:{border};" class="player-card">
+        <h3>{player.name} ({player.archetype})</h3>
+        <p style="font-size:1.2em;">Capacity: <b>{player.capacity}</b> | Status: <b>{player.status}</b></p>
+        <p style="font-size:0.9em; color:#aaa;">Assists Left: {assists_left}/8</p>
+    </div>
+    """
+
+def rain_card_html(c):
+    tags = ""
+    if c.is_joint: tags += "<span style='background-color:#5c5cff; color:white; padding:2px 6px; border-radius:4px; margin-right:5px;'>🤝 Joint</span>"
+    if c.accumulated_tokens > 0: tags += f"<span style='background-color:#521818; color:white; padding:2px 6px; border-radius:4px;'>🔥 Stress: +{c.accumulated_tokens}</span>"
+    if tags: tags = "<br>" + tags
+    
+    return f"""
+    <div class="rain-card">
+        <h4>⛈ {c.title} <small>({c.type})</small></h4>
+        <p><i>"{c.flavor_text}"</i></p>
+        <p class="scenario-text">🤔 {c.scenario}</p>
+        <p>Weight: <b>{c.weight}</b> | Exhaust: <b>-{c.exhaust}</b> {tags}</p>
+    </div>
+    """
+
+def shine_card_html(shine):
+    return f"""
+    <div class="shine-card">
+        <h2>☀️ {shine.title}</h2>
+        <p><i>"{shine.flavor_text}"</i></p>
+        <p class="scenario-text"><b>Reflect:</b> {shine.scenario}</p>
+        <h3>+{shine.weight} Capacity</h3>
+    </div>
+    """
+
+# --- CHARTS ---
+# Built straight from g.series (engine.TurnSeries), so a rerun only formats
+# the arrays it already has.
+
+SERIES_TITLES = {"capacity": "Capacity", "damage": "Exhaust damage taken", "absorb": "Damage absorbed for partner",
+                 "weight": "Rain card weight left", "stress": "Stress tokens on Rain card"}
+
+def sparkline_svg(values, width=140, height=30, color="#4da6ff"):
+    values = list(values)
+    if len(values) < 2: values = values * 2
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1
+    step = width / (len(values) - 1)
+    points = " ".join(f"{i * step:.1f},{height - 2 - (v - lo) / span * (height - 4):.1f}" for i, v in enumerate(values))
+    return (f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<polyline points="{points}" fill="none" stroke="{color}" stroke-width="2"/></svg>')
+
+def sparklines_html(g, seat):
+    # Capacity (ending at its live value) and damage per turn for one seat.
+    capacity = list(g.series.player("capacity", seat)) + [g.players[seat].capacity]
+    damage = g.series.player("damage", seat)[1:]
+    return f"""
+    <div style="font-size:0.8em; color:#aaa;">
+        {sparkline_svg(capacity)} Capacity<br>
+        {sparkline_svg(damage or [0], color="#FF4B4B")} Damage
+    </div>
+    """
+
+def chart_data(g):
+    # Title -> {"Turn": [...], one column per seat} for the game-over charts.
+    series = g.series
+    if g.phase != "Setup" and game_result(g)[0]:
+        # Ended mid-turn (the tenth card was resolved): add the final position.
+        # A game lost at Exhaust was already sampled by end_turn.
+        series = copy.deepcopy(series)
+        series.sample(g, g.turn)
+    names = [p.name for p in g.players]
+    labels = names if len(set(names)) == len(names) else [f"{n} ({i + 1})" for i, n in enumerate(names)]
+    turns = list(series.turn)
+    charts = {}
+    for key, title in SERIES_TITLES.items():
+        charts[title] = {"Turn": turns, **{label: list(series.player(key, i)) for i, label in enumerate(labels)}}
+    charts["Cards resolved"] = {"Turn": turns, "Resolved": list(series.resolved)}
+    return charts
+
+def game_report(g):
+    # The "Copy Game Log & Stats" text. logparse.py reads this format back.
+    _, victory, fail_msg = game_result(g)
+    cs = g.card_stats
+    
+    report = []
+    report.append(f"GAME RESULT: {'VICTORY' if victory else 'DEFEAT'}")
+    report.append(f"REASON: {fail_msg if not victory else 'Resolved 10 Cards'}")
+    report.append("-" * 30)
+    report.append(f"PLAYER STATS")
+    for i, p in enumerate(g.players):
+        if i: report.append("")
+        report.append(f"{p.name} ({p.archetype}):")
+        report.append(f"  - Capacity: Start {g.rolls[i]}, End {p.capacity}")
+        report.append(f"  - High/Low Cap: {p.max_cap} / {p.min_cap}")
+        report.append(f"  - Total Burnout Accumulated: {p.total_burnout_gained}")
+        report.append(f"  - Assists Used: {p.assists_used}/8")
+    report.append("-" * 30)
+    report.append(f"CARDS DRAWN")
+    report.append(f"  Drizzle: {cs['Drizzle']}")
+    report.append(f"  Downpour: {cs['Downpour']}")
+    report.append(f"  Hurricane: {cs['Hurricane']}")
+    report.append(f"  Shine: {cs['Shine']}")
+    report.append("-" * 30)
+    report.append("FULL GAME LOG:")
+    
+    for line in g.log:
+        report.append(line)
+        
+    return "\n".join(report)